@@ -353,7 +353,7 @@ function handleTicketSubmit() {
             // Check if content contains multiple tickets (separated by double newlines or --- or similar)
             const tickets = parseMultipleTickets(content);
             if (tickets.length > 1) {
-                processBatchTickets(tickets);
+                processBatchTickets(tickets, content);
             } else {
                 processTicket(content, uploadedFile.name);
             }
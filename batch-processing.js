@@ -16,28 +16,35 @@ function parseMultipleTickets(content) {
         .filter(t => t.match(/[A-Za-z]/))
 }
 
-async function processBatchTickets(tickets) {
+async function processBatchTickets(tickets, content = null) {
     // Update processing overlay to show batch progress
     showBatchProcessingOverlay(tickets.length);
     
-    // Process tickets sequentially to avoid overwhelming the server
-    let completed = 0;
-    const results = [];
-    
-    for (const ticket of tickets) {
+    let results = null;
+    if (content !== null) {
+        // Preferred path: one upload, the server splits and streams results back
+        const stream = { started: false, results: [], done: new Set() };
         try {
-            const result = await processTicketAsync(ticket);
-            // If the processing returned a ticketData, add to results
-            if (result) results.push(result);
+            results = await streamBatchTickets(content, tickets.length, stream);
         } catch (error) {
-            // Log but don't stop the batch; we'll still update progress in finally
-            console.error('Error processing ticket:', error);
-        } finally {
-            // Always increment progress and update UI so the counter moves even on failures
-            completed++;
-            updateBatchProgress(completed, tickets.length);
+            if (stream.started) {
+                // Keep what was already shown; re-send only tickets with no result
+                console.error('Streaming batch broke off, re-sending the remaining tickets:', error);
+                const remaining = tickets
+                    .map((ticket, index) => ({ ticket, index }))
+                    .filter(({ index }) => !stream.done.has(index));
+                const rest = await processTicketsSequentially(
+                    remaining.map(r => r.ticket), stream.done.size, tickets.length
+                );
+                results = stream.results.concat(rest);
+            } else {
+                console.error('Streaming batch failed, falling back to per-ticket requests:', error);
+            }
         }
     }
+    if (results === null) {
+        results = await processTicketsSequentially(tickets);
+    }
     
     // Hide processing overlay
     hideProcessingOverlay();
@@ -57,6 +64,90 @@ async function processBatchTickets(tickets) {
     setActiveTab('ticket-list');
 }
 
+async function streamBatchTickets(content, expectedTotal, stream = { started: false, results: [], done: new Set() }) {
+    // POST the whole document to /analyze/batch and read NDJSON lines as each
+    // server-side batch completes. Progress is recorded in `stream` (whether
+    // the start line arrived, results shown so far and their indices) so a
+    // caller can tell a failed request from one that broke off midway.
+    // Sent as a file part: plain form fields are capped at ~1 MB by the
+    // server's multipart parser, and file uploads get the MAX_UPLOAD_BYTES
+    // check (413) instead
+    const formData = new FormData();
+    formData.append('tickets_file', new Blob([content], { type: 'text/plain' }), 'tickets.txt');
+    formData.append('echo_text', 'full');
+
+    const response = await fetch(getApiBase() + '/analyze/batch', {
+        method: 'POST',
+        body: formData
+    });
+    if (!response.ok || !response.body) {
+        const text = await response.text();
+        throw new Error(`API error: ${response.status} ${response.statusText} - ${text}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    const results = stream.results;
+    let total = expectedTotal;
+    let completed = 0;
+    let buffered = '';
+
+    const handleLine = (line) => {
+        if (!line.trim()) return;
+        const msg = JSON.parse(line);
+        if (msg.type === 'start') {
+            stream.started = true;
+            total = msg.total;
+            updateBatchProgress(0, total);
+        } else if (msg.type === 'result') {
+            const ticketData = ticketDataFromResult(msg.ticket_text || '', msg, msg.index);
+            showProcessedTicket(ticketData);
+            results.push(ticketData);
+            stream.done.add(msg.index);
+            completed++;
+            updateBatchProgress(completed, total);
+        } else if (msg.type === 'error') {
+            console.error('Error processing ticket', msg.index, msg.error);
+            completed++;
+            updateBatchProgress(completed, total);
+        }
+    };
+
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffered += decoder.decode(value, { stream: true });
+        const lines = buffered.split('\n');
+        buffered = lines.pop();
+        lines.forEach(handleLine);
+    }
+    handleLine(buffered + decoder.decode());
+    return results;
+}
+
+async function processTicketsSequentially(tickets, alreadyCompleted = 0, total = null) {
+    // Process tickets sequentially to avoid overwhelming the server
+    let completed = alreadyCompleted;
+    const overallTotal = total === null ? tickets.length : total;
+    const results = [];
+    
+    for (const ticket of tickets) {
+        try {
+            const result = await processTicketAsync(ticket);
+            // If the processing returned a ticketData, add to results
+            if (result) results.push(result);
+        } catch (error) {
+            // Log but don't stop the batch; we'll still update progress in finally
+            console.error('Error processing ticket:', error);
+        } finally {
+            // Always increment progress and update UI so the counter moves even on failures
+            completed++;
+            updateBatchProgress(completed, overallTotal);
+        }
+    }
+    return results;
+}
+
 function showBatchProcessingOverlay(total) {
     const overlay = document.getElementById('processingOverlay');
     if (!overlay) return;
@@ -133,15 +224,45 @@ function showBatchSummary(results) {
     }, 10000);
 }
 
+function getApiBase() {
+    return (window.location && window.location.protocol && window.location.protocol.startsWith('http'))
+        ? window.location.origin
+        : 'http://localhost:8000';
+}
+
+function ticketDataFromResult(content, result, index = null) {
+    // Streamed results can arrive within the same millisecond, so the
+    // ticket's index in the batch keeps their ids distinct
+    const suffix = index === null || index === undefined ? '' : '-' + index;
+    const ticketId = 'T' + Date.now().toString().slice(-6) + suffix;
+    return {
+        id: ticketId,
+        content: content,
+        priority: result && result.priority ? result.priority : 'unknown',
+        confidence: result && typeof result.confidence === 'number' ? result.confidence : 0,
+        priorityScores: result && result.priority_scores ? result.priority_scores : {}
+    };
+}
+
+function showProcessedTicket(ticketData) {
+    // Try to update UI, but swallow errors so batch processing can continue
+    try {
+        addTicketToList(ticketData);
+
+        if (window.AppState) {
+            window.AppState.updateStats(ticketData);
+        }
+    } catch (uiErr) {
+        console.error('UI update error after processing ticket:', uiErr);
+    }
+}
+
 // Convert the original processTicket to use promises for batch processing
 function processTicketAsync(content) {
     const formData = new FormData();
     formData.append('ticket', content);
     
-    const apiBase = (window.location && window.location.protocol && window.location.protocol.startsWith('http'))
-        ? window.location.origin
-        : 'http://localhost:8000';
-    const analyzeUrl = apiBase + '/analyze';
+    const analyzeUrl = getApiBase() + '/analyze';
 
     return fetch(analyzeUrl, {
         method: 'POST',
@@ -156,29 +277,9 @@ function processTicketAsync(content) {
         return response.json();
     })
     .then(result => {
-        const ticketId = 'T' + Date.now().toString().slice(-6);
-
         // Build ticket data from result (keep even if UI fails)
-        const ticketData = {
-            id: ticketId,
-            content: content,
-            priority: result && result.priority ? result.priority : 'unknown',
-            confidence: result && typeof result.confidence === 'number' ? result.confidence : 0,
-            priorityScores: result && result.priority_scores ? result.priority_scores : {}
-        };
-
-        // Try to update UI, but swallow errors so the promise stays fulfilled
-        try {
-            addTicketToList(ticketData);
-
-            if (window.AppState) {
-                window.AppState.updateStats(ticketData);
-            }
-        } catch (uiErr) {
-            console.error('UI update error after processing ticket:', uiErr);
-            // proceed — we still return ticketData so the batch progress can continue
-        }
-
+        const ticketData = ticketDataFromResult(content, result);
+        showProcessedTicket(ticketData);
         return ticketData;
     });
-}
\ No newline at end of file
+}
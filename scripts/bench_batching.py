@@ -0,0 +1,95 @@
+"""Benchmark fixed-size vs token-budget batching for ticket encoding.
+
+Reads texts from a JSONL file (`text`/`content`/`body` field) or a plain text
+file of tickets separated by `---` lines, then encodes them with:
+
+  - input order: one `encode` call per consecutive chunk of N texts, i.e.
+               batches padded exactly as they arrive
+  - fixed:     `TicketVectorizer.encode(texts, batch_size=N)` (previous
+               behaviour; sentence-transformers sorts by character length
+               inside a single call)
+  - budget:    `TicketVectorizer.encode(texts, max_tokens=M)` (token-count
+               buckets under a padded-token budget)
+
+and prints padding efficiency and wall-clock time for each.
+
+Usage:
+  python scripts/bench_batching.py --input test_tickets.txt --repeat 20
+"""
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.batching import fixed_size_batches, padding_efficiency, token_budget_batches, token_lengths
+from src.vectorize import TicketVectorizer
+
+
+def load_texts(path: Path):
+    if path.suffix == ".jsonl":
+        texts = []
+        with open(path, "r", encoding="utf-8") as fh:
+            for line in fh:
+                obj = json.loads(line)
+                txt = obj.get("text") or obj.get("content") or obj.get("body") or ""
+                if txt:
+                    texts.append(txt)
+        return texts
+    content = path.read_text(encoding="utf-8")
+    return [t.strip() for t in re.split(r"\n\s*---+\s*\n", content) if t.strip()]
+
+
+def time_encode(vectorizer, texts, **kwargs) -> float:
+    start = time.perf_counter()
+    vectorizer.encode(texts, **kwargs)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare fixed and token-budget encoding batches")
+    parser.add_argument("--input", required=True, help="JSONL or ---separated text file of tickets")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2", help="SentenceTransformers model name or path")
+    parser.add_argument("--batch-size", type=int, default=32, help="Fixed batch size baseline")
+    parser.add_argument("--max-tokens", type=int, default=2048, help="Padded-token budget per batch")
+    parser.add_argument("--repeat", type=int, default=1, help="Repeat the corpus N times to lengthen the run")
+    args = parser.parse_args()
+
+    texts = load_texts(Path(args.input)) * args.repeat
+    if not texts:
+        print("No texts found.")
+        sys.exit(1)
+
+    vectorizer = TicketVectorizer(model_name=args.model)
+    lengths = token_lengths(
+        texts,
+        tokenizer=getattr(vectorizer.model, "tokenizer", None),
+        max_length=getattr(vectorizer.model, "max_seq_length", None),
+    )
+    fixed_eff = padding_efficiency(lengths, fixed_size_batches(len(texts), args.batch_size))
+    budget_eff = padding_efficiency(lengths, token_budget_batches(lengths, max_tokens=args.max_tokens))
+
+    # Warm up once so model initialisation is not timed.
+    vectorizer.encode(texts[: args.batch_size])
+    start = time.perf_counter()
+    for batch in fixed_size_batches(len(texts), args.batch_size):
+        vectorizer.encode([texts[i] for i in batch], batch_size=args.batch_size)
+    input_order_s = time.perf_counter() - start
+    fixed_s = time_encode(vectorizer, texts, batch_size=args.batch_size)
+    budget_s = time_encode(vectorizer, texts, max_tokens=args.max_tokens)
+
+    print(f"texts: {len(texts)}  mean tokens: {sum(lengths) / len(lengths):.1f}  max tokens: {max(lengths)}")
+    print(f"padding efficiency, input-order batches of {args.batch_size}: {fixed_eff:.1%}")
+    print(f"padding efficiency, token budget {args.max_tokens}: {budget_eff:.1%}")
+    print(f"input-order batches of {args.batch_size}: {input_order_s:.2f}s")
+    print(f"encode(batch_size={args.batch_size}): {fixed_s:.2f}s  speedup x{input_order_s / fixed_s:.2f}")
+    print(f"encode(max_tokens={args.max_tokens}): {budget_s:.2f}s  speedup x{input_order_s / budget_s:.2f}")
+
+
+if __name__ == "__main__":
+    main()
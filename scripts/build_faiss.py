@@ -5,6 +5,9 @@ Each line in the input JSONL should be a JSON object with at least one text fiel
 
 Usage:
   python scripts\build_faiss.py --input data/articles.jsonl --index-out data/faiss.index --meta-out data/faiss_meta.json
+  python scripts\build_faiss.py --input data/articles.jsonl --shards 4 --manifest-out data/faiss_shards/manifest.json
+  python scripts\build_faiss.py --input data/articles.jsonl --snapshot-root data/indexes --activate
+  python scripts\build_faiss.py --input data/articles.jsonl --pca-dim 128 --whiten
 
 This script uses the `FaissIndexManager` in `src/faiss_index.py`.
 """
@@ -19,6 +22,7 @@ if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
 from src.faiss_index import FaissIndexManager
+from src.index_snapshots import SnapshotStore, save_snapshot
 
 
 def main():
@@ -27,6 +31,15 @@ def main():
     parser.add_argument("--index-out", default="data/faiss.index", help="Output path for FAISS index")
     parser.add_argument("--meta-out", default="data/faiss_meta.json", help="Output path for metadata JSON")
     parser.add_argument("--model", default="all-MiniLM-L6-v2", help="SentenceTransformers model to use for embeddings")
+    parser.add_argument("--shards", type=int, default=1, help="Split the index into N shards searched in parallel")
+    parser.add_argument("--shard-by", default=None, help="Article field to partition shards by (default: hash of id)")
+    parser.add_argument("--manifest-out", default="data/faiss_shards/manifest.json", help="Output manifest path when --shards > 1")
+    parser.add_argument("--snapshot-root", default=None, help="Save as a new versioned snapshot under this directory instead of --index-out/--manifest-out")
+    parser.add_argument("--activate", action="store_true", help="Point the snapshot root's CURRENT at the new snapshot (servers watching it hot-swap)")
+    parser.add_argument("--max-tokens", type=int, default=2048, help="Padded-token budget per length-sorted encoding batch (0 = fixed batches of 32)")
+    parser.add_argument("--pca-dim", type=int, default=None, help="Reduce vectors to this dimension with a PCA projection fitted on the corpus (e.g. 128 or 64)")
+    parser.add_argument("--whiten", action="store_true", help="Whiten the PCA projection (scale components to unit variance)")
+    parser.add_argument("--eval-queries", type=int, default=200, help="Articles sampled as queries to measure recall loss of --pca-dim (0 = skip)")
     args = parser.parse_args()
 
     input_path = Path(args.input)
@@ -37,7 +50,16 @@ def main():
     print(f"Building FAISS index from {input_path} using model {args.model}...")
     fim = FaissIndexManager()
     try:
-        count = fim.build_from_jsonl(str(input_path), model_name=args.model)
+        count = fim.build_from_jsonl(
+            str(input_path),
+            model_name=args.model,
+            max_tokens=args.max_tokens or None,
+            num_shards=args.shards,
+            shard_by=args.shard_by,
+            projection_dim=args.pca_dim,
+            whiten=args.whiten,
+            eval_queries=args.eval_queries,
+        )
     except Exception as e:
         print(f"Failed to build index: {e}")
         sys.exit(1)
@@ -46,11 +68,36 @@ def main():
         print("No articles indexed. Check the input file format and fields.")
         sys.exit(1)
 
+    report = fim.projection_report
+    if report:
+        print(
+            f"PCA {report['full_dim']} -> {report['reduced_dim']}{' (whitened)' if args.whiten else ''}: "
+            f"recall@{report['k']} vs full-dimension search {report['recall_at_k']:.3f} "
+            f"over {report['queries']} queries"
+        )
+        print(
+            f"  vectors: {report['full_bytes'] / 2**20:.1f} MB -> {report['reduced_bytes'] / 2**20:.1f} MB; "
+            f"search: {report['full_latency_ms']:.3f} ms -> {report['reduced_latency_ms']:.3f} ms per query"
+        )
+
     index_out = Path(args.index_out)
     meta_out = Path(args.meta_out)
-    print(f"Indexed {count} articles. Saving index to {index_out} and metadata to {meta_out}...")
     try:
-        fim.save(str(index_out), str(meta_out))
+        if args.snapshot_root:
+            store = SnapshotStore(args.snapshot_root)
+            snapshot_dir = store.new_version_dir()
+            print(f"Indexed {count} articles. Saving snapshot {snapshot_dir.name} to {snapshot_dir}...")
+            save_snapshot(fim, snapshot_dir)
+            if args.activate:
+                store.activate(snapshot_dir.name)
+                print(f"Activated snapshot {snapshot_dir.name}.")
+        elif args.shards > 1:
+            manifest_out = Path(args.manifest_out)
+            print(f"Indexed {count} articles into {args.shards} shards. Saving shards and manifest to {manifest_out}...")
+            fim.save_sharded(str(manifest_out))
+        else:
+            print(f"Indexed {count} articles. Saving index to {index_out} and metadata to {meta_out}...")
+            fim.save(str(index_out), str(meta_out))
     except Exception as e:
         print(f"Failed to save index or metadata: {e}")
         sys.exit(1)
@@ -0,0 +1,90 @@
+"""Evaluate the priority classifier cascade on a labeled ticket set.
+
+For each margin threshold, reports how many tickets the cheap keyword tier
+answers on its own (bart-large-mnli calls saved), how often the cascade
+agrees with running the model on every ticket, and the accuracy of both
+against the labels.
+
+Input is JSONL with a text field (`text`/`content`/`body`) and a label field
+(`priority` or `label`, one of low/medium/high).
+
+Usage:
+  python scripts/eval_cascade.py --input data/labeled_tickets.jsonl --thresholds 0.25,0.5,0.75,1.0
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.priority import TicketPriorityClassifier
+
+
+def load_labeled(path: Path, limit: int = 0):
+    texts, labels = [], []
+    with open(path, "r", encoding="utf-8") as fh:
+        for line in fh:
+            obj = json.loads(line)
+            txt = obj.get("text") or obj.get("content") or obj.get("body")
+            label = obj.get("priority") or obj.get("label")
+            if not txt or not label:
+                continue
+            texts.append(txt)
+            labels.append(str(label).lower())
+            if limit and len(texts) >= limit:
+                break
+    return texts, labels
+
+
+def top_label(scores):
+    return max(scores.items(), key=lambda x: x[1])[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agreement vs compute saved for the priority cascade")
+    parser.add_argument("--input", required=True, help="Labeled JSONL file")
+    parser.add_argument("--model", default="facebook/bart-large-mnli", help="Zero-shot model for the expensive tier")
+    parser.add_argument("--thresholds", default="0.25,0.5,0.75,1.0", help="Comma-separated margin thresholds")
+    parser.add_argument("--limit", type=int, default=0, help="Only evaluate the first N tickets")
+    args = parser.parse_args()
+
+    texts, labels = load_labeled(Path(args.input), args.limit)
+    if not texts:
+        print("No labeled tickets found.")
+        sys.exit(1)
+
+    clf = TicketPriorityClassifier(model_name=args.model)
+    clf._ensure_pipeline()
+    if clf._classifier is None:
+        print("Warning: zero-shot model unavailable; the expensive tier is the keyword fallback.")
+
+    start = time.perf_counter()
+    model_preds = [top_label(s) for s in clf._model_batch(texts, count=False)]
+    model_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cheap = [clf.cheap_scores(t) for t in texts]
+    cheap_s = time.perf_counter() - start
+    cheap_preds = [top_label(s) for s, _ in cheap]
+
+    n = len(texts)
+    model_acc = sum(p == l for p, l in zip(model_preds, labels)) / n
+    print(f"tickets: {n}  model-only accuracy: {model_acc:.1%}  "
+          f"model time: {model_s:.2f}s  cheap tier time: {cheap_s:.3f}s")
+    print(f"{'threshold':>9}  {'cheap %':>8}  {'agreement':>9}  {'accuracy':>8}  {'est. time':>9}")
+    for threshold in (float(t) for t in args.thresholds.split(",")):
+        routed = [margin >= threshold for _, margin in cheap]
+        preds = [c if r else m for c, m, r in zip(cheap_preds, model_preds, routed)]
+        cheap_frac = sum(routed) / n
+        agreement = sum(p == m for p, m in zip(preds, model_preds)) / n
+        accuracy = sum(p == l for p, l in zip(preds, labels)) / n
+        est_s = cheap_s + model_s * (1 - cheap_frac)
+        print(f"{threshold:>9.2f}  {cheap_frac:>8.1%}  {agreement:>9.1%}  {accuracy:>8.1%}  {est_s:>8.2f}s")
+
+
+if __name__ == "__main__":
+    main()
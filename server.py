@@ -1,5 +1,9 @@
 """
 Run the FastAPI server with static file serving for the UI.
+
+Usage:
+  python server.py                 # single process
+  python server.py --workers 4     # preforked workers sharing model weights (see src/prefork.py)
 """
 import uvicorn
 from fastapi import FastAPI
@@ -28,22 +32,82 @@ else:
         print("Warning: no index.html or static/ directory found — UI will not be served by the backend.")
 
 # Try to auto-load FAISS index into the API's faiss_manager if index files exist.
-try:
-    from src import api as api_module
-    FAISS_INDEX_PATH = ROOT_DIR / "data" / "faiss.index"
-    FAISS_META_PATH = ROOT_DIR / "data" / "faiss_meta.json"
-    if FAISS_INDEX_PATH.exists() and FAISS_META_PATH.exists():
-        try:
-            print(f"Loading FAISS index from {FAISS_INDEX_PATH}...")
-            api_module.faiss_manager.load(str(FAISS_INDEX_PATH), str(FAISS_META_PATH))
-            print("FAISS index loaded into API (faiss_manager).")
-        except Exception as e:
-            print(f"Failed to load FAISS index: {e}")
+# Skipped when this module is re-imported as __mp_main__ by a spawned
+# inference worker, which never serves /recommend.
+if __name__ != "__mp_main__":
+    try:
+        from src import api as api_module
+        FAISS_INDEX_PATH = ROOT_DIR / "data" / "faiss.index"
+        FAISS_META_PATH = ROOT_DIR / "data" / "faiss_meta.json"
+        FAISS_MANIFEST_PATH = ROOT_DIR / "data" / "faiss_shards" / "manifest.json"
+        if api_module.index_swapper.store.current():
+            try:
+                print(f"Loading FAISS index snapshot {api_module.index_swapper.store.current()}...")
+                # This may run before --workers forks: no model inference
+                # here (see src/prefork.py), so the smoke test only probes
+                # the index itself
+                api_module.index_swapper.reload(probe_only=True)
+                print("FAISS index snapshot loaded into API (faiss_manager).")
+            except Exception as e:
+                print(f"Failed to load FAISS index snapshot: {e}")
+        elif FAISS_MANIFEST_PATH.exists():
+            try:
+                print(f"Loading sharded FAISS index from {FAISS_MANIFEST_PATH}...")
+                api_module.faiss_manager.load_sharded(str(FAISS_MANIFEST_PATH))
+                print(f"Sharded FAISS index loaded into API ({len(api_module.faiss_manager.index.shards)} shards).")
+            except Exception as e:
+                print(f"Failed to load sharded FAISS index: {e}")
+        elif FAISS_INDEX_PATH.exists() and FAISS_META_PATH.exists():
+            try:
+                print(f"Loading FAISS index from {FAISS_INDEX_PATH}...")
+                api_module.faiss_manager.load(str(FAISS_INDEX_PATH), str(FAISS_META_PATH))
+                print("FAISS index loaded into API (faiss_manager).")
+            except Exception as e:
+                print(f"Failed to load FAISS index: {e}")
+        else:
+            print("FAISS index files not found; /recommend will be unavailable until index is loaded.")
+    except Exception as e:
+        print(f"Could not auto-load FAISS index: {e}")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the ticket analyzer API and UI")
+    parser.add_argument("--host", default="0.0.0.0", help="Interface to bind")
+    parser.add_argument("--port", type=int, default=8000, help="Port to bind")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of preforked workers sharing the loaded models (Unix only)",
+    )
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        from src import api as api_module
+        from src.prefork import serve_prefork
+
+        if api_module.inference_pool is not None:
+            # Each forked HTTP worker would start its own inference pool
+            raise SystemExit(
+                "--workers > 1 cannot be combined with TICKET_INFERENCE_WORKERS; "
+                "use either preforked HTTP workers or an inference pool"
+            )
+        if api_module.INDEX_WATCH_INTERVAL <= 0:
+            # Admin reloads only rewrite the snapshot pointer; each worker's
+            # watcher swaps its own copy of the index
+            api_module.INDEX_WATCH_INTERVAL = 2.0
+        serve_prefork(
+            app,
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            models=(api_module.priority_classifier, api_module.vectorizer),
+        )
     else:
-        print("FAISS index files not found; /recommend will be unavailable until index is loaded.")
-except Exception as e:
-    print(f"Could not auto-load FAISS index: {e}")
+        uvicorn.run(app, host=args.host, port=args.port)
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    main()
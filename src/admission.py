@@ -0,0 +1,229 @@
+"""
+Priority-aware admission control for model inference.
+
+Only `slots` inferences run at once; everything else waits in a queue
+ordered by request class, so a burst of bulk work can't delay urgent
+tickets:
+
+    urgent       single tickets the keyword pre-scorer marks "high"
+    interactive  other single tickets (/analyze)
+    batch        /analyze/batch documents
+    bulk         background triage jobs (src/jobs.py)
+
+Each class has a queue-depth limit and a deadline for how long a request
+may wait. A request that finds its queue full is shed immediately, and one
+that waits past its deadline gives up; both raise `Overloaded`, and the API
+then answers with the keyword classifier instead of timing out.
+
+    admission = AdmissionController(slots=2)
+    scores = await admission.run("interactive", classifier.classify, text)
+
+`run` releases the slot only when the worker thread finishes, so a client
+that disconnects mid-inference can't let more than `slots` inferences run.
+`async with admission.admit(klass): ...` holds a slot for a block of
+event-loop code, and background threads use the blocking
+`with admission.hold("bulk"): ...`.
+"""
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from typing import Callable, Dict, Optional
+
+CLASSES = ("urgent", "interactive", "batch", "bulk")
+# Most recent queue waits kept per class for percentiles
+WAIT_SAMPLES = 1000
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed (queue full) or misses its deadline."""
+
+    def __init__(self, klass: str, reason: str):
+        super().__init__(f"{klass} request {reason}")
+        self.klass = klass
+        self.reason = reason
+
+
+class _Waiter:
+    __slots__ = ("rank", "seq", "klass", "wake", "granted", "abandoned")
+
+    def __init__(self, rank: int, seq: int, klass: str, wake: Callable[[], None]):
+        self.rank = rank
+        self.seq = seq
+        self.klass = klass
+        self.wake = wake
+        self.granted = False
+        self.abandoned = False
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.rank, self.seq) < (other.rank, other.seq)
+
+
+def _percentile(samples, q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class AdmissionController:
+    """Grant inference slots to waiting requests in class-priority order.
+
+    Args:
+        slots: Inferences allowed to run concurrently
+        max_queue: Per-class limit on waiting requests (None = unlimited)
+        deadlines: Per-class seconds a request may wait (None = forever)
+    """
+
+    def __init__(
+        self,
+        slots: int = 1,
+        max_queue: Optional[Dict[str, Optional[int]]] = None,
+        deadlines: Optional[Dict[str, Optional[float]]] = None,
+    ):
+        self.slots = max(1, slots)
+        self.max_queue = {k: None for k in CLASSES}
+        self.max_queue.update(max_queue or {})
+        self.deadlines = {k: None for k in CLASSES}
+        self.deadlines.update(deadlines or {})
+        self._free = self.slots
+        self._heap = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self.waiting = {k: 0 for k in CLASSES}
+        self.counters = {k: {"admitted": 0, "shed": 0, "timed_out": 0} for k in CLASSES}
+        self._waits = {k: deque(maxlen=WAIT_SAMPLES) for k in CLASSES}
+        # Runs `run` calls; never busier than `slots`
+        self._executor = ThreadPoolExecutor(max_workers=self.slots, thread_name_prefix="inference")
+
+    def _try_enqueue(self, klass: str, wake: Callable[[], None]) -> Optional[_Waiter]:
+        """Take a free slot (returns None) or queue a waiter; raise if shed."""
+        if klass not in self.waiting:
+            raise ValueError(f"unknown request class: {klass}")
+        with self._lock:
+            if self._free > 0 and not self._heap:
+                self._free -= 1
+                self._admitted(klass, 0.0)
+                return None
+            limit = self.max_queue[klass]
+            if limit is not None and self.waiting[klass] >= limit:
+                self.counters[klass]["shed"] += 1
+                raise Overloaded(klass, "shed: queue full")
+            waiter = _Waiter(CLASSES.index(klass), next(self._seq), klass, wake)
+            heapq.heappush(self._heap, waiter)
+            self.waiting[klass] += 1
+            return waiter
+
+    def _admitted(self, klass: str, waited: float):
+        self.counters[klass]["admitted"] += 1
+        self._waits[klass].append(waited)
+
+    def _give_up(self, waiter: _Waiter, timed_out: bool = True) -> bool:
+        """Abandon a queued waiter; False if it was granted a slot meanwhile."""
+        with self._lock:
+            if waiter.granted:
+                return False
+            waiter.abandoned = True
+            self.waiting[waiter.klass] -= 1
+            if timed_out:
+                self.counters[waiter.klass]["timed_out"] += 1
+            return True
+
+    def release(self):
+        """Hand the slot to the highest-priority waiter, or free it."""
+        with self._lock:
+            while self._heap:
+                waiter = heapq.heappop(self._heap)
+                if waiter.abandoned:
+                    continue
+                waiter.granted = True
+                self.waiting[waiter.klass] -= 1
+                waiter.wake()
+                return
+            self._free += 1
+
+    async def _acquire(self, klass: str, deadline: Optional[float] = None):
+        """Wait (on the event loop) until a slot is granted; raise if shed."""
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: granted.done() or granted.set_result(True))
+
+        start = time.monotonic()
+        waiter = self._try_enqueue(klass, wake)
+        if waiter is not None:
+            timeout = deadline if deadline is not None else self.deadlines[klass]
+            try:
+                await asyncio.wait_for(asyncio.shield(granted), timeout)
+            except asyncio.TimeoutError:
+                if self._give_up(waiter):
+                    raise Overloaded(klass, f"missed its {timeout}s queue deadline")
+                # Granted just as we gave up: take the slot after all
+            except asyncio.CancelledError:
+                # Client went away while queued
+                if not self._give_up(waiter, timed_out=False):
+                    self.release()
+                raise
+            with self._lock:
+                self._admitted(klass, time.monotonic() - start)
+
+    @asynccontextmanager
+    async def admit(self, klass: str, deadline: Optional[float] = None):
+        """Hold a slot for the body of an `async with` (event-loop callers)."""
+        await self._acquire(klass, deadline)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def run(self, klass: str, fn: Callable, *args, deadline: Optional[float] = None):
+        """Run blocking `fn(*args)` in a worker thread once a slot is granted.
+
+        The slot is released when the thread finishes, not when the caller
+        stops waiting: a cancelled request leaves its inference running.
+        """
+        await self._acquire(klass, deadline)
+        try:
+            work = self._executor.submit(fn, *args)
+        except BaseException:
+            self.release()
+            raise
+        work.add_done_callback(lambda _: self.release())
+        return await asyncio.wrap_future(work)
+
+    @contextmanager
+    def hold(self, klass: str, deadline: Optional[float] = None):
+        """Blocking variant of `admit` for worker threads."""
+        granted = threading.Event()
+        start = time.monotonic()
+        waiter = self._try_enqueue(klass, granted.set)
+        if waiter is not None:
+            timeout = deadline if deadline is not None else self.deadlines[klass]
+            if not granted.wait(timeout) and self._give_up(waiter):
+                raise Overloaded(klass, f"missed its {timeout}s queue deadline")
+            with self._lock:
+                self._admitted(klass, time.monotonic() - start)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            classes = {}
+            for klass in CLASSES:
+                waits = list(self._waits[klass])
+                classes[klass] = {
+                    "waiting": self.waiting[klass],
+                    "max_queue": self.max_queue[klass],
+                    "deadline_s": self.deadlines[klass],
+                    **self.counters[klass],
+                    "wait_p50_ms": _percentile(waits, 0.50) * 1000,
+                    "wait_p99_ms": _percentile(waits, 0.99) * 1000,
+                }
+            return {"slots": self.slots, "in_use": self.slots - self._free, "classes": classes}
@@ -1,24 +1,54 @@
 """
 FastAPI endpoint for ticket analysis and priority classification.
+
+Set TICKET_INFERENCE_WORKERS=N to run the models in N dedicated inference
+processes (see src/inference_pool.py) instead of inside the web process.
+
+/recommend searches the `articles` collection (the live `faiss_manager`)
+by default; other named collections are registered in `index_registry`
+(see src/index_registry.py) and load on first use.
+
+Model inference is admitted through `admission` (see src/admission.py):
+urgent tickets first, then interactive, batch and bulk work. Requests shed
+or past their queue deadline are answered by the keyword classifier and
+flagged `degraded`.
 """
-from typing import Dict, Optional
+import csv
+import hmac
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
 
-from fastapi import FastAPI, File, Form, UploadFile
+from fastapi import BackgroundTasks, FastAPI, File, Form, Header, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 from src.priority import TicketPriorityClassifier
 from src.vectorize import TicketVectorizer
 from fastapi.middleware.cors import CORSMiddleware
+from src.chunking import split_tickets
 from src.faiss_index import FaissIndexManager
+from src.admission import AdmissionController, Overloaded
+from src.index_registry import IndexRegistry
+from src.index_snapshots import IndexHotSwapper, SnapshotStore
+from src.inference_pool import InferencePool, RemotePriorityClassifier, RemoteVectorizer
+from src.jobs import JobRunner, JobStore, iter_tickets
 
 
 class TicketAnalysis(BaseModel):
     """Response model for ticket analysis."""
     
-    ticket_text: str
+    ticket_text: Optional[str] = None
+    ticket_text_truncated: bool = False
+    ticket_length: int = 0
     priority: str
     confidence: float
     priority_scores: Dict[str, float]
+    # True when the keyword classifier answered because the model was overloaded
+    degraded: bool = False
     similar_tickets: Optional[list] = None
 
 
@@ -37,84 +67,573 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize models
-priority_classifier = TicketPriorityClassifier()
-vectorizer = TicketVectorizer()
+# Uploads larger than this are rejected with 413 before being fully read
+MAX_UPLOAD_BYTES = int(os.environ.get("TICKET_MAX_UPLOAD_BYTES", str(2 * 1024 * 1024)))
+UPLOAD_READ_CHUNK = 64 * 1024
+# Characters of ticket text echoed back when echo_text="truncated"
+ECHO_PREVIEW_CHARS = 2000
+# Most tickets accepted in one /analyze/batch document
+MAX_BATCH_TICKETS = int(os.environ.get("TICKET_MAX_BATCH_TICKETS", "1000"))
+# Bulk job files are spooled to disk, so they may be much larger
+MAX_JOB_UPLOAD_BYTES = int(os.environ.get("TICKET_MAX_JOB_UPLOAD_BYTES", str(1024 * 1024 * 1024)))
+INDEX_SNAPSHOT_ROOT = os.environ.get(
+    "TICKET_INDEX_ROOT", str(Path(__file__).resolve().parent.parent / "data" / "indexes")
+)
+# Seconds between checks of the snapshot CURRENT pointer (0 = no watcher;
+# server.py turns it on for preforked workers, see /admin/index/reload)
+INDEX_WATCH_INTERVAL = float(os.environ.get("TICKET_INDEX_WATCH", "0"))
+# /admin endpoints require a matching X-Admin-Token header and are disabled
+# (503) when no token is configured
+ADMIN_TOKEN = os.environ.get("TICKET_ADMIN_TOKEN")
+# JSON file describing extra named collections (see IndexRegistry.load_config)
+COLLECTIONS_CONFIG = os.environ.get(
+    "TICKET_COLLECTIONS", str(Path(__file__).resolve().parent.parent / "data" / "collections.json")
+)
+# Historical ticket embeddings written by `python -m src.vectorize`
+TICKET_EMBEDDINGS_PATH = Path(__file__).resolve().parent.parent / "data" / "ticket_embeddings.npy"
+# Titles/snippets for those tickets; without them hits would be bare ids
+TICKET_META_PATH = TICKET_EMBEDDINGS_PATH.with_name("ticket_embeddings_meta.json")
+# Combined memory budget for lazily loaded collections (unset = unlimited)
+INDEX_MEMORY_MB = os.environ.get("TICKET_INDEX_MEMORY_MB")
+DEFAULT_COLLECTION = "articles"
+JOB_DB_PATH = os.environ.get(
+    "TICKET_JOB_DB", str(Path(__file__).resolve().parent.parent / "data" / "jobs.sqlite3")
+)
+
+
+async def read_upload_text(upload: UploadFile, limit: int = MAX_UPLOAD_BYTES) -> str:
+    """Read an uploaded file in chunks, refusing anything over `limit` bytes."""
+    buf = bytearray()
+    while True:
+        chunk = await upload.read(UPLOAD_READ_CHUNK)
+        if not chunk:
+            break
+        buf.extend(chunk)
+        if len(buf) > limit:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Uploaded ticket exceeds the {limit} byte limit",
+            )
+    return buf.decode("utf-8", errors="replace")
+
+
+async def spool_upload(upload: UploadFile, limit: int) -> str:
+    """Stream an upload to a temporary file (caller deletes it) and return its path."""
+    fd, path = tempfile.mkstemp(suffix=Path(upload.filename or "").suffix)
+    size = 0
+    with os.fdopen(fd, "wb") as fh:
+        while True:
+            chunk = await upload.read(UPLOAD_READ_CHUNK)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > limit:
+                fh.close()
+                os.unlink(path)
+                raise HTTPException(status_code=413, detail=f"Upload exceeds the {limit} byte limit")
+            fh.write(chunk)
+    return path
+
+
+def echo_ticket_text(ticket_text: str, echo_text: str):
+    """Return (text to echo, truncated flag) for the requested echo mode."""
+    if echo_text == "none":
+        return None, False
+    if echo_text == "truncated" and len(ticket_text) > ECHO_PREVIEW_CHARS:
+        return ticket_text[:ECHO_PREVIEW_CHARS], True
+    return ticket_text, False
+
+
+# Initialize models, either in-process or behind a pool of inference workers
+INFERENCE_WORKERS = int(os.environ.get("TICKET_INFERENCE_WORKERS", "0"))
+# Keyword-tier margin above which bart-large-mnli is skipped (unset = always use the model)
+CASCADE_THRESHOLD = os.environ.get("TICKET_CASCADE_THRESHOLD")
+classifier_options = {"cascade_threshold": float(CASCADE_THRESHOLD)} if CASCADE_THRESHOLD else {}
+inference_pool: Optional[InferencePool] = None
+if INFERENCE_WORKERS > 0:
+    inference_pool = InferencePool(workers=INFERENCE_WORKERS, classifier_options=classifier_options)
+    priority_classifier = RemotePriorityClassifier(inference_pool)
+    vectorizer = RemoteVectorizer(inference_pool)
+else:
+    priority_classifier = TicketPriorityClassifier(**classifier_options)
+    vectorizer = TicketVectorizer()
+# Keyword tier only (never loads the model): pre-scores tickets for
+# admission and answers requests shed under overload
+keyword_classifier = TicketPriorityClassifier()
+
+# Concurrent model inferences; more requests queue by class
+INFERENCE_SLOTS = int(os.environ.get("TICKET_INFERENCE_SLOTS", str(max(1, INFERENCE_WORKERS))))
+# Waiting requests allowed per class before new ones are shed
+MAX_QUEUE = int(os.environ.get("TICKET_MAX_QUEUE", "64"))
+# Seconds a single ticket / a batch may wait for a slot before degrading
+INTERACTIVE_DEADLINE = float(os.environ.get("TICKET_INTERACTIVE_DEADLINE", "2.0"))
+BATCH_DEADLINE = float(os.environ.get("TICKET_BATCH_DEADLINE", "30.0"))
+# Tickets a background job classifies per slot grant, so an interactive
+# request never waits behind more than this much bulk inference
+BULK_SUB_BATCH = int(os.environ.get("TICKET_BULK_SUB_BATCH", "4"))
+admission = AdmissionController(
+    slots=INFERENCE_SLOTS,
+    # Bulk jobs run in the background, so they simply wait their turn
+    max_queue={"urgent": MAX_QUEUE, "interactive": MAX_QUEUE, "batch": MAX_QUEUE},
+    deadlines={"urgent": INTERACTIVE_DEADLINE, "interactive": INTERACTIVE_DEADLINE, "batch": BATCH_DEADLINE},
+)
+
+
+def admission_class(ticket_text: str) -> str:
+    """Admission class for a single ticket: urgent if the keyword pre-scorer says high."""
+    scores, margin = keyword_classifier.cheap_scores(ticket_text)
+    if margin > 0 and max(scores, key=scores.get) == "high":
+        return "urgent"
+    return "interactive"
+
+
+def admitted_classify_batch(texts: List[str]) -> List[Dict[str, float]]:
+    """classify_batch for background jobs, queued behind interactive work.
+
+    The slot is taken per sub-batch of BULK_SUB_BATCH tickets rather than for
+    the whole job chunk, so waiting requests get it between sub-batches.
+    """
+    step = max(1, BULK_SUB_BATCH)
+    scores: List[Dict[str, float]] = []
+    for start in range(0, len(texts), step):
+        with admission.hold("bulk"):
+            scores.extend(priority_classifier.classify_batch(texts[start:start + step]))
+    return scores
+
 # FAISS manager (index can be built offline and saved/loaded)
 faiss_manager = FaissIndexManager()
+# Versioned snapshots that can be hot-swapped into faiss_manager
+index_swapper = IndexHotSwapper(faiss_manager, SnapshotStore(INDEX_SNAPSHOT_ROOT), embedder=vectorizer)
+# Named collections; "articles" always resolves to the live faiss_manager
+index_registry = IndexRegistry(memory_budget=int(float(INDEX_MEMORY_MB) * 2**20) if INDEX_MEMORY_MB else None)
+index_registry.register(DEFAULT_COLLECTION, lambda: faiss_manager, pinned=True)
+if TICKET_EMBEDDINGS_PATH.exists() and TICKET_META_PATH.exists():
+    index_registry.register_path("tickets", str(TICKET_EMBEDDINGS_PATH), meta_path=str(TICKET_META_PATH))
+elif TICKET_EMBEDDINGS_PATH.exists():
+    print(
+        f"Note: not serving the 'tickets' collection: {TICKET_META_PATH.name} is missing; "
+        "re-run `python -m src.vectorize` to write it"
+    )
+if Path(COLLECTIONS_CONFIG).exists():
+    try:
+        index_registry.load_config(COLLECTIONS_CONFIG)
+    except Exception as e:
+        print(f"Warning: could not read collections config {COLLECTIONS_CONFIG}: {e}")
+
+
+def article_result(meta: Dict, score: float) -> Dict:
+    """Shape a FAISS hit for API responses."""
+    return {
+        "title": meta.get("title"),
+        "snippet": meta.get("snippet"),
+        "score": score,
+        "orig_id": meta.get("orig_id"),
+    }
+
+
+def recommend_batch(texts: List[str], top_k: int) -> List[List[Dict]]:
+    """Batched recommendations for bulk jobs (empty when no index is loaded)."""
+    if faiss_manager.index is None:
+        return [[] for _ in texts]
+    hits = faiss_manager.search_batch(texts, top_k=top_k, embedder=vectorizer)
+    return [[article_result(meta, score) for meta, score in h] for h in hits]
+
+
+# Bulk triage jobs (created on first use so importing the API has no side effects)
+job_store: Optional[JobStore] = None
+job_runner: Optional[JobRunner] = None
+
+
+def get_job_store() -> JobStore:
+    global job_store
+    if job_store is None:
+        job_store = JobStore(JOB_DB_PATH)
+    return job_store
+
+
+def get_job_runner() -> JobRunner:
+    global job_runner
+    if job_runner is None:
+        job_runner = JobRunner(
+            get_job_store(),
+            # Look the models up at call time so they can be swapped/mocked
+            classify_batch=admitted_classify_batch,
+            recommend_batch=lambda texts, top_k: recommend_batch(texts, top_k),
+            workers=int(os.environ.get("TICKET_JOB_WORKERS", "1")),
+        )
+    return job_runner
+
+
+@app.on_event("startup")
+async def start_inference_pool():
+    if inference_pool is not None:
+        inference_pool.start()
+
+
+@app.on_event("startup")
+async def start_job_runner():
+    # Also resumes jobs interrupted by a previous shutdown or crash
+    get_job_runner().start()
+
+
+@app.on_event("startup")
+async def start_index_watcher():
+    if INDEX_WATCH_INTERVAL > 0:
+        index_swapper.watch(INDEX_WATCH_INTERVAL)
+
+
+@app.on_event("shutdown")
+async def stop_inference_pool():
+    if inference_pool is not None:
+        inference_pool.close()
+
+
+@app.on_event("shutdown")
+async def stop_job_runner():
+    if job_runner is not None:
+        job_runner.stop()
 
 
 @app.post("/analyze", response_model=TicketAnalysis)
 async def analyze_ticket(
     ticket: str = Form(...),
     ticket_file: Optional[UploadFile] = File(None),
+    echo_text: str = Form("full"),
 ):
     """Analyze a support ticket for priority and similar tickets.
     
     Args:
         ticket: The ticket text (if submitting directly)
         ticket_file: Optional file upload containing ticket text
+            (at most MAX_UPLOAD_BYTES, read in chunks)
+        echo_text: How to return the ticket text: "full", "truncated"
+            (first ECHO_PREVIEW_CHARS characters) or "none"
         
     Returns:
         TicketAnalysis object with priority classification and similar tickets
     """
+    if echo_text not in ("full", "truncated", "none"):
+        raise HTTPException(status_code=422, detail="echo_text must be one of: full, truncated, none")
+
     # Get ticket text from either form field or uploaded file
     if ticket_file:
-        ticket_text = (await ticket_file.read()).decode("utf-8")
+        ticket_text = await read_upload_text(ticket_file)
     else:
         ticket_text = ticket
         
-    # Classify priority (protect against model/runtime errors)
+    # Classify priority (protect against model/runtime errors). Inference
+    # runs off the event loop once admitted; under overload the keyword
+    # classifier answers instead.
+    degraded = False
     try:
-        priority, confidence = priority_classifier.get_priority(ticket_text)
-        priority_scores = priority_classifier.classify(ticket_text)
+        try:
+            priority_scores = await admission.run(admission_class(ticket_text), priority_classifier.classify, ticket_text)
+        except Overloaded:
+            priority_scores = keyword_classifier.keyword_scores(ticket_text)
+            degraded = True
+        priority, confidence = max(priority_scores.items(), key=lambda x: x[1])
     except Exception as e:
         # Log and return a 500-friendly message via HTTPException
         # Avoid exposing internal stack traces to the client
         import logging
         logging.exception("Priority classification failed")
-        from fastapi import HTTPException
 
         raise HTTPException(status_code=500, detail=f"Priority classification error: {e}")
     
     # Create response
+    echoed, truncated = echo_ticket_text(ticket_text, echo_text)
     analysis = TicketAnalysis(
-        ticket_text=ticket_text,
+        ticket_text=echoed,
+        ticket_text_truncated=truncated,
+        ticket_length=len(ticket_text),
         priority=priority,
         confidence=confidence,
         priority_scores=priority_scores,
+        degraded=degraded,
     )
     
     return analysis
 
 
+@app.post("/analyze/batch")
+async def analyze_batch(
+    tickets: Optional[str] = Form(None),
+    tickets_file: Optional[UploadFile] = File(None),
+    batch_size: int = Form(8),
+    echo_text: str = Form("truncated"),
+):
+    """Split a multi-ticket document and stream per-ticket results as NDJSON.
+
+    The document is split with the same rules as the UI
+    (`split_tickets`), classified `batch_size` tickets at a time through
+    `classify_batch`, and each batch's results are written as soon as it
+    completes. Lines look like:
+
+        {"type": "start", "total": 12}
+        {"type": "result", "index": 0, "priority": "high", ...}
+        {"type": "error", "index": 5, "error": "..."}
+        {"type": "done", "completed": 12, "failed": 0}
+    """
+    if echo_text not in ("full", "truncated", "none"):
+        raise HTTPException(status_code=422, detail="echo_text must be one of: full, truncated, none")
+    if tickets_file:
+        content = await read_upload_text(tickets_file)
+    elif tickets is not None:
+        content = tickets
+    else:
+        raise HTTPException(status_code=422, detail="Provide tickets text or tickets_file")
+
+    ticket_texts = split_tickets(content)
+    if len(ticket_texts) > MAX_BATCH_TICKETS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Document contains {len(ticket_texts)} tickets; the limit is {MAX_BATCH_TICKETS}",
+        )
+    batch_size = max(1, min(batch_size, 64))
+
+    async def stream():
+        yield json.dumps({"type": "start", "total": len(ticket_texts)}) + "\n"
+        failed = 0
+        for start in range(0, len(ticket_texts), batch_size):
+            batch: List[str] = ticket_texts[start:start + batch_size]
+            degraded = False
+            try:
+                try:
+                    # Run inference off the event loop so other requests keep flowing
+                    scores = await admission.run("batch", priority_classifier.classify_batch, batch)
+                except Overloaded:
+                    scores = [keyword_classifier.keyword_scores(text) for text in batch]
+                    degraded = True
+            except Exception as e:
+                failed += len(batch)
+                for offset in range(len(batch)):
+                    yield json.dumps({"type": "error", "index": start + offset, "error": str(e)}) + "\n"
+                continue
+            for offset, (text, priority_scores) in enumerate(zip(batch, scores)):
+                priority, confidence = max(priority_scores.items(), key=lambda x: x[1])
+                echoed, truncated = echo_ticket_text(text, echo_text)
+                yield json.dumps({
+                    "type": "result",
+                    "index": start + offset,
+                    "ticket_text": echoed,
+                    "ticket_text_truncated": truncated,
+                    "ticket_length": len(text),
+                    "priority": priority,
+                    "confidence": confidence,
+                    "priority_scores": priority_scores,
+                    "degraded": degraded,
+                }) + "\n"
+        yield json.dumps({"type": "done", "completed": len(ticket_texts) - failed, "failed": failed}) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
 @app.post("/recommend")
-async def recommend_articles(ticket: str = Form(...), top_k: int = 10):
+async def recommend_articles(
+    ticket: str = Form(...),
+    top_k: int = 10,
+    filters: Optional[str] = Form(None),
+    collection: str = Form(DEFAULT_COLLECTION),
+):
     """Return top-K recommended articles for a ticket text.
 
     This endpoint expects a FAISS index to be built and loaded by the server
     beforehand via FaissIndexManager.load(). If not available, returns an
-    empty list with a helpful message.
+    empty list with a helpful message. `filters` is an optional JSON object
+    of article fields that must match (e.g. {"product": "mail"}).
+    `collection` selects a named collection (e.g. "tickets"); collections
+    other than "articles" are loaded on first use.
+    Repeated queries are answered from the manager's result cache.
     """
-    if faiss_manager.index is None:
+    if collection not in index_registry.names():
+        raise HTTPException(status_code=404, detail=f"Unknown collection: {collection}")
+    try:
+        manager = await run_in_threadpool(index_registry.get, collection)
+    except Exception as e:
+        return {"ok": False, "error": f"Could not load collection {collection}: {e}"}
+    if manager.index is None:
         return {"ok": False, "error": "FAISS index not loaded. Build/load an index first."}
 
+    search_kwargs = {}
+    if filters:
+        try:
+            search_kwargs["filters"] = json.loads(filters)
+        except ValueError as e:
+            return {"ok": False, "error": f"Invalid filters JSON: {e}"}
+        if not isinstance(search_kwargs["filters"], dict):
+            return {"ok": False, "error": "filters must be a JSON object"}
+
     # Use vectorizer to encode and perform search
     try:
-        hits = faiss_manager.search(ticket, top_k=top_k, embedder=vectorizer)
-        articles = []
-        for meta, score in hits:
-            articles.append({
-                "title": meta.get("title"),
-                "snippet": meta.get("snippet"),
-                "score": score,
-                "orig_id": meta.get("orig_id"),
-            })
+        # Encoding may run in the inference pool or in-process; either way keep it off the event loop
+        hits = await run_in_threadpool(
+            index_registry.search, collection, ticket, top_k=top_k, embedder=vectorizer, **search_kwargs
+        )
+        articles = [article_result(meta, score) for meta, score in hits]
         return {"ok": True, "results": articles}
     except Exception as e:
         return {"ok": False, "error": str(e)}
 
 
+@app.post("/jobs")
+async def submit_job(
+    file: UploadFile = File(...),
+    recommend: bool = Form(False),
+    top_k: int = Form(5),
+    file_format: Optional[str] = Form(None),
+):
+    """Submit a JSONL or CSV file of tickets for background triage.
+
+    Each row needs a text field (text/content/body/ticket/description) and
+    may carry an id. The format is taken from `file_format` or the file
+    extension. Returns a job id to poll with GET /jobs/{job_id}.
+    """
+    path = await spool_upload(file, MAX_JOB_UPLOAD_BYTES)
+    fmt = file_format or Path(file.filename or "").suffix.lstrip(".") or "jsonl"
+    try:
+        job_id = await run_in_threadpool(
+            get_job_store().create_job,
+            iter_tickets(path, fmt),
+            {"recommend": recommend, "top_k": top_k, "filename": file.filename},
+        )
+    except (ValueError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=f"Could not parse {fmt} file: {e}")
+    finally:
+        os.unlink(path)
+    return await job_status(job_id)
+
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    """Return a job's status and progress."""
+    job = await run_in_threadpool(get_job_store().get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    total = job["total"] or 0
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "total": total,
+        "processed": job["processed"],
+        "failed": job["failed"],
+        "progress": (job["processed"] / total) if total else 0.0,
+        "error": job["error"],
+    }
+
+
+@app.get("/jobs/{job_id}/results")
+async def job_results(job_id: str, offset: int = 0, limit: Optional[int] = None):
+    """Download the results processed so far as JSONL, in ticket order.
+
+    `offset` (a ticket index) and `limit` page through the results, e.g. to
+    fetch only what was processed since the last poll.
+    """
+    if offset < 0 or (limit is not None and limit < 1):
+        raise HTTPException(status_code=422, detail="offset must be >= 0 and limit >= 1")
+    store = get_job_store()
+    if await run_in_threadpool(store.get_job, job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return StreamingResponse(
+        store.iter_results(job_id, offset=offset, limit=limit),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{job_id}.jsonl"'},
+    )
+
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job; results so far stay downloadable."""
+    store = get_job_store()
+    job = await run_in_threadpool(store.get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] in ("queued", "running"):
+        await run_in_threadpool(store.set_status, job_id, "cancelled", None, job["status"])
+    return await job_status(job_id)
+
+
+def require_admin(token: Optional[str]):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=503, detail="Admin endpoints are disabled; set TICKET_ADMIN_TOKEN")
+    if not token or not hmac.compare_digest(token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+def _switch_index(version: str):
+    try:
+        index_swapper.switch_to(version)
+    except Exception:
+        import logging
+        logging.exception("Index reload failed")
+
+
+@app.get("/admin/index")
+async def index_status(x_admin_token: Optional[str] = Header(None)):
+    """Report the live, previous and available index snapshots.
+
+    With preforked workers this is the state of whichever worker answered.
+    """
+    require_admin(x_admin_token)
+    return index_swapper.status()
+
+
+@app.post("/admin/index/reload", status_code=202)
+async def reload_index(
+    background_tasks: BackgroundTasks,
+    version: Optional[str] = Form(None),
+    x_admin_token: Optional[str] = Header(None),
+):
+    """Publish a snapshot (default: CURRENT) and swap it in on every worker.
+
+    Rewrites the CURRENT pointer; each server process's index watcher then
+    loads, smoke-tests and swaps the snapshot in while its live index keeps
+    serving. Without a watcher (single process, TICKET_INDEX_WATCH=0) this
+    process reloads in the background itself. Poll GET /admin/index for
+    the outcome.
+    """
+    require_admin(x_admin_token)
+    store = index_swapper.store
+    target = version or store.current()
+    if not target or target not in store.versions():
+        raise HTTPException(status_code=404, detail=f"Index snapshot not found: {target}")
+    await run_in_threadpool(store.activate, target)
+    if not index_swapper.watching:
+        background_tasks.add_task(_switch_index, target)
+    return {"ok": True, "loading": target}
+
+
+@app.post("/admin/index/rollback")
+async def rollback_index(x_admin_token: Optional[str] = Header(None)):
+    """Point CURRENT back at the previous snapshot on every worker.
+
+    Workers still holding that index in memory swap it back instantly;
+    others reload it from disk. Without a watcher this process swaps now.
+    """
+    require_admin(x_admin_token)
+    try:
+        version = await run_in_threadpool(index_swapper.store.rollback)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if not index_swapper.watching:
+        try:
+            await run_in_threadpool(index_swapper.switch_to, version)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Rollback to {version} failed: {e}")
+    return {"ok": True, "current": version}
+
+
+@app.get("/admission")
+async def admission_status():
+    """Inference slot use and per-class queue depth, shedding and wait percentiles."""
+    return admission.stats()
+
+
+@app.get("/collections")
+async def list_collections():
+    """Per-collection load state, memory use and search stats."""
+    return index_registry.stats()
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
@@ -128,8 +647,29 @@ async def model_status():
     This endpoint helps debugging whether the heavy transformer pipeline
     is loaded or the server is using the lightweight fallback.
     """
+    status = {}
+    cache = getattr(faiss_manager, "cache", None)
+    if cache is not None:
+        status["recommend_cache"] = cache.stats()
+    status["collections"] = index_registry.stats()["collections"]
+    status["admission"] = admission.stats()
+    if inference_pool is not None:
+        try:
+            loaded = await run_in_threadpool(inference_pool.broadcast, "model_loaded", 5.0)
+            model_loaded = any(loaded)
+        except Exception:
+            model_loaded = False
+        try:
+            # The cascade runs inside the workers, so its counters live there
+            status["priority_tier_counts"] = await run_in_threadpool(inference_pool.tier_counts)
+        except Exception:
+            pass
+        return {"priority_model_loaded": model_loaded, "inference_pool": inference_pool.stats(), **status}
     try:
         model_loaded = getattr(priority_classifier, "_classifier", None) is not None
     except Exception:
         model_loaded = False
-    return {"priority_model_loaded": model_loaded}
\ No newline at end of file
+    tier_counts = getattr(priority_classifier, "tier_counts", None)
+    if tier_counts is not None:
+        status["priority_tier_counts"] = dict(tier_counts)
+    return {"priority_model_loaded": model_loaded, **status}
\ No newline at end of file
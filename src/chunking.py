@@ -0,0 +1,105 @@
+"""
+Split long ticket text into model-sized chunks, and multi-ticket
+documents into individual tickets.
+
+Transformers silently truncate (MiniLM at 256 tokens) or fail (BART beyond
+1024 tokens) on long inputs, and a multi-megabyte upload would otherwise be
+pushed through the pipeline in one piece. `chunk_text` cuts text into
+overlapping word windows that fit a token limit and caps how many chunks
+are kept, so the work per ticket is bounded no matter how large it is.
+Chunks are also capped in characters, so text without whitespace
+(minified logs, base64, CJK) can't turn into one huge "word".
+"""
+import re
+from typing import List, Sequence
+
+from src.batching import approx_token_count
+
+# Words per token budget, the inverse of approx_token_count's 1.3 tokens/word.
+_WORDS_PER_TOKEN = 1 / 1.3
+# Character cap per token of budget; generous for prose, binding for
+# whitespace-free text where the word-based estimate is meaningless.
+_CHARS_PER_TOKEN = 8
+
+
+def _split_long_words(words: List[str], max_chars: int) -> List[str]:
+    out: List[str] = []
+    for word in words:
+        if len(word) <= max_chars:
+            out.append(word)
+        else:
+            out.extend(word[i:i + max_chars] for i in range(0, len(word), max_chars))
+    return out
+
+
+def _join_capped(words: Sequence[str], max_chars: int) -> str:
+    parts: List[str] = []
+    size = 0
+    for word in words:
+        size += len(word) + (1 if parts else 0)
+        if size > max_chars and parts:
+            break
+        parts.append(word)
+    return " ".join(parts)[:max_chars]
+
+
+def chunk_text(
+    text: str,
+    max_tokens: int = 256,
+    max_chunks: int = 8,
+    overlap_tokens: int = 32,
+) -> List[str]:
+    """Split `text` into at most `max_chunks` windows of ~`max_tokens` tokens.
+
+    Short texts come back as a single chunk unchanged. Windows overlap by
+    `overlap_tokens` so a sentence cut at a boundary is still seen whole.
+    When the text needs more than `max_chunks` windows, the windows are
+    spread evenly over the whole text (start, middle and end are all
+    represented) rather than just taking the head. No chunk is longer than
+    `max_tokens * 8` characters.
+    """
+    text = text or ""
+    max_chars = max(1, max_tokens * _CHARS_PER_TOKEN)
+    if approx_token_count(text) <= max_tokens and len(text) <= max_chars:
+        return [text]
+    words = _split_long_words(text.split(), max_chars)
+    window = max(1, int((max_tokens - 2) * _WORDS_PER_TOKEN))
+    step = max(1, window - int(overlap_tokens * _WORDS_PER_TOKEN))
+    starts = list(range(0, max(1, len(words) - window + step), step))
+    if len(starts) > max_chunks:
+        if max_chunks <= 1:
+            starts = starts[:1]
+        else:
+            last = len(starts) - 1
+            starts = [starts[round(i * last / (max_chunks - 1))] for i in range(max_chunks)]
+    return [_join_capped(words[s:s + window], max_chars) for s in starts]
+
+
+def chunk_weights(chunks: Sequence[str]) -> List[float]:
+    """Relative weight of each chunk (its word count) for score aggregation."""
+    counts = [max(1, len(c.split())) for c in chunks]
+    total = float(sum(counts))
+    return [c / total for c in counts]
+
+
+_TICKET_SEPARATOR = re.compile(r"\n\s*---+\s*\n")
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n(?=[A-Za-z])")
+
+
+def split_tickets(content: str) -> List[str]:
+    """Split a multi-ticket document into tickets.
+
+    Mirrors `parseMultipleTickets` in batch-processing.js: split on `---`
+    separator lines, or on blank lines followed by a paragraph starting with
+    a letter when there are no separators; drop empty and separator-only
+    pieces and pieces without any letters.
+    """
+    content = content or ""
+    tickets = _TICKET_SEPARATOR.split(content)
+    if len(tickets) == 1:
+        tickets = _PARAGRAPH_BREAK.split(content)
+    tickets = [t.strip() for t in tickets]
+    return [
+        t for t in tickets
+        if t and not re.fullmatch(r"-+", t) and re.search(r"[A-Za-z]", t)
+    ]
@@ -5,12 +5,19 @@ Usage:
   - Build an index from a JSONL of articles (each line: {"id":..., "title":..., "text":...})
   - Save/load FAISS index and metadata mapping
   - Search by query embedding
+  - Optionally split the index into shards searched in parallel
+    (see src/faiss_shards.py)
+  - Cache top-k results per query, invalidated whenever the index changes
+  - Optionally reduce vectors with a PCA/whitening projection saved with
+    the index and applied to queries (see src/projection.py)
 
 This is intentionally lightweight and synchronous to keep the example simple.
 """
 from pathlib import Path
+import itertools
 import json
-from typing import Dict, List, Tuple, Optional
+import threading
+from typing import Any, Dict, List, Tuple, Optional
 
 import numpy as np
 try:
@@ -18,20 +25,111 @@ try:
 except Exception:
     faiss = None  # type: ignore
 
+from src.batching import DEFAULT_MAX_TOKENS
+from src.cache import TTLCache
+from src.faiss_shards import ShardedIndex, build_sharded, load_manifest, partition, read_manifest, save_manifest
+from src.projection import apply_projection, compare_projection, fit_projection, load_projection, save_projection
 from src.vectorize import TicketVectorizer
 
 
+# Process-wide so two managers (or a manager before and after a reload)
+# never share an index version.
+_index_versions = itertools.count(1)
+
+
+def _normalize_query(query: str) -> str:
+    return " ".join((query or "").split())
+
+
+def _embed_queries(embedder, queries: List[str]) -> np.ndarray:
+    """Embed query texts for search; long tickets are embedded chunk-wise
+    (see `TicketVectorizer.encode_document`) instead of silently truncated.
+    """
+    if hasattr(embedder, "encode_documents"):
+        q = embedder.encode_documents(queries)
+    elif hasattr(embedder, "encode_document"):
+        q = np.stack([embedder.encode_document(query) for query in queries])
+    else:
+        q = np.asarray(embedder.encode(queries, max_tokens=DEFAULT_MAX_TOKENS)).reshape(len(queries), -1)
+    return np.ascontiguousarray(q, dtype="float32")
+
+
+def _meta_matches(meta: Optional[Dict], filters: Dict[str, Any]) -> bool:
+    if not meta:
+        return False
+    raw = meta.get("raw") or {}
+    return all(meta.get(k, raw.get(k)) == v for k, v in filters.items())
+
+
 class FaissIndexManager:
-    def __init__(self, dim: Optional[int] = None):
+    def __init__(
+        self,
+        dim: Optional[int] = None,
+        cache_size: int = 1024,
+        cache_ttl: Optional[float] = 300.0,
+    ):
         self.index = None
         self.id_to_meta: Dict[int, Dict] = {}
         self.next_id = 0
         self.dim = dim
+        self.shard_by: Optional[str] = None
+        self.projection = None
+        self.projection_report: Optional[Dict[str, float]] = None
+        self.cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self.version = 0
+        self._lock = threading.RLock()
+
+    def _index_changed(self):
+        """Give the index a new version and drop cached results for the old one."""
+        self.version = next(_index_versions)
+        self.cache.clear()
+
+    def _snapshot(self):
+        """Return a consistent (index, id_to_meta, projection) for one search."""
+        with self._lock:
+            return self.index, self.id_to_meta, self.projection
 
-    def build_from_jsonl(self, jsonl_path: str, model_name: str = "all-MiniLM-L6-v2") -> int:
+    def swap_from(self, other: "FaissIndexManager") -> "FaissIndexManager":
+        """Atomically take over `other`'s index and metadata.
+
+        Searches already running keep using the objects they started with;
+        new searches see the new index. Returns a detached manager holding
+        the previous index so it can be swapped back (rollback).
+        """
+        previous = FaissIndexManager(cache_size=0)
+        with self._lock:
+            previous.index, previous.id_to_meta = self.index, self.id_to_meta
+            previous.next_id, previous.dim, previous.shard_by = self.next_id, self.dim, self.shard_by
+            previous.projection = self.projection
+            self.index, self.id_to_meta = other.index, other.id_to_meta
+            self.next_id, self.dim, self.shard_by = other.next_id, other.dim, other.shard_by
+            self.projection = other.projection
+            self._index_changed()
+        return previous
+
+    def build_from_jsonl(
+        self,
+        jsonl_path: str,
+        model_name: str = "all-MiniLM-L6-v2",
+        max_tokens: Optional[int] = DEFAULT_MAX_TOKENS,
+        num_shards: int = 1,
+        shard_by: Optional[str] = None,
+        projection_dim: Optional[int] = None,
+        whiten: bool = False,
+        eval_queries: int = 200,
+    ) -> int:
         """Read articles from JSONL and build the FAISS index.
 
         Each JSON line should contain at least: id (str/int), title, text (body).
+        Articles are encoded in length-sorted batches of at most `max_tokens`
+        padded tokens (None falls back to fixed batches of 32).
+        With `num_shards` > 1 the vectors are split by hash of the article id,
+        or by hash of the `shard_by` field, into a `ShardedIndex`.
+        With `projection_dim`, a PCA projection (whitened if `whiten`) is
+        fitted on the corpus and vectors are stored reduced; recall, memory
+        and latency against full-dimension search are measured on
+        `eval_queries` held-out articles (with a PCA fitted without them)
+        and kept in `projection_report`.
         Returns number of indexed items.
         """
         if faiss is None:
@@ -60,20 +158,35 @@ class FaissIndexManager:
         if not texts:
             return 0
 
-        embeddings = vec.encode(texts, show_progress_bar=True)
+        embeddings = vec.encode(texts, show_progress_bar=True, max_tokens=max_tokens)
         embeddings = np.array(embeddings).astype('float32')
 
+        self.projection = None
+        self.projection_report = None
+        if projection_dim:
+            self.projection = fit_projection(embeddings, projection_dim, whiten=whiten)
+            if eval_queries:
+                self.projection_report = compare_projection(
+                    embeddings, projection_dim, whiten=whiten, n_queries=eval_queries
+                )
+            embeddings = apply_projection(self.projection, embeddings)
+
         self.dim = embeddings.shape[1]
-        index = faiss.IndexFlatIP(self.dim)  # cosine if vectors are normalized
-        # ensure normalized (our vectorizer normalizes by default)
-        if not index.is_trained:
-            pass
-        index.add(embeddings)
+        if num_shards > 1:
+            index = build_sharded(embeddings, partition(metas, num_shards, attribute=shard_by), num_shards)
+            self.shard_by = shard_by
+        else:
+            index = faiss.IndexFlatIP(self.dim)  # cosine if vectors are normalized
+            # ensure normalized (our vectorizer normalizes by default)
+            if not index.is_trained:
+                pass
+            index.add(embeddings)
 
         # store mapping
         self.index = index
         self.id_to_meta = {i: metas[i] for i in range(len(metas))}
         self.next_id = len(metas)
+        self._index_changed()
         return len(metas)
 
     def save(self, index_path: str, meta_path: str):
@@ -81,8 +194,16 @@ class FaissIndexManager:
             raise RuntimeError("faiss not available")
         if self.index is None:
             raise RuntimeError("index not built")
+        if isinstance(self.index, ShardedIndex):
+            raise RuntimeError("index is sharded; use save_sharded()")
         Path(index_path).parent.mkdir(parents=True, exist_ok=True)
         faiss.write_index(self.index, index_path)
+        projection_path = Path(index_path + ".pca")
+        if self.projection is not None:
+            save_projection(self.projection, str(projection_path))
+        elif projection_path.exists():
+            # Don't leave a stale projection from an earlier build behind
+            projection_path.unlink()
         with open(meta_path, "w", encoding="utf-8") as fh:
             json.dump(self.id_to_meta, fh, ensure_ascii=False, indent=2)
 
@@ -90,25 +211,159 @@ class FaissIndexManager:
         if faiss is None:
             raise RuntimeError("faiss not available")
         self.index = faiss.read_index(index_path)
+        projection_path = Path(index_path + ".pca")
+        self.projection = load_projection(str(projection_path)) if projection_path.exists() else None
         with open(meta_path, "r", encoding="utf-8") as fh:
             self.id_to_meta = json.load(fh)
         self.next_id = max(int(k) for k in self.id_to_meta.keys()) + 1
         self.dim = self.index.d
+        self._index_changed()
+
+    def save_sharded(self, manifest_path: str, meta_file: str = "faiss_meta.json"):
+        """Save a sharded index as shard files plus a manifest in one directory."""
+        if not isinstance(self.index, ShardedIndex):
+            raise RuntimeError("index is not sharded; use save()")
+        projection_file = None
+        if self.projection is not None:
+            projection_file = "projection.pca"
+            Path(manifest_path).parent.mkdir(parents=True, exist_ok=True)
+            save_projection(self.projection, str(Path(manifest_path).parent / projection_file))
+        save_manifest(self.index, manifest_path, meta_file, attribute=self.shard_by, projection=projection_file)
+        with open(Path(manifest_path).parent / meta_file, "w", encoding="utf-8") as fh:
+            json.dump(self.id_to_meta, fh, ensure_ascii=False, indent=2)
+
+    def load_sharded(self, manifest_path: str):
+        """Load the shards (local or remote) and metadata named by a manifest."""
+        manifest = read_manifest(manifest_path)
+        self.index = load_manifest(manifest_path)
+        projection_file = manifest.get("projection")
+        self.projection = (
+            load_projection(str(Path(manifest_path).parent / projection_file)) if projection_file else None
+        )
+        with open(Path(manifest_path).parent / manifest["meta"], "r", encoding="utf-8") as fh:
+            self.id_to_meta = json.load(fh)
+        self.next_id = max((int(k) for k in self.id_to_meta.keys()), default=-1) + 1
+        self.dim = self.index.d
+        self.shard_by = manifest.get("attribute")
+        self._index_changed()
+
+    def add_texts(
+        self,
+        texts: List[str],
+        metas: List[Dict],
+        embedder: Optional[TicketVectorizer] = None,
+    ) -> int:
+        """Incrementally add items to a flat index. Returns the number added.
 
-    def search(self, query: str, top_k: int = 10, embedder: Optional[TicketVectorizer] = None) -> List[Tuple[Dict, float]]:
-        """Return list of (meta, score) for top_k matches for the query text."""
+        FAISS can't add to an index while it is being searched, so the
+        vectors go into a copy that then replaces the live index; searches
+        in flight finish on the old one.
+        """
+        if self.index is None:
+            raise RuntimeError("index not built")
+        if isinstance(self.index, ShardedIndex):
+            raise RuntimeError("incremental adds are not supported for sharded indexes; rebuild instead")
+        if not texts:
+            return 0
+        if embedder is None:
+            embedder = TicketVectorizer()
+        embeddings = np.asarray(embedder.encode(list(texts), max_tokens=DEFAULT_MAX_TOKENS)).astype('float32')
+        with self._lock:
+            embeddings = apply_projection(self.projection, embeddings)
+            index = faiss.clone_index(self.index)
+            # FAISS flat indexes number rows sequentially from ntotal
+            start = int(index.ntotal)
+            index.add(embeddings)
+            id_to_meta = dict(self.id_to_meta)
+            for offset, meta in enumerate(metas):
+                id_to_meta[start + offset] = meta
+            self.index, self.id_to_meta = index, id_to_meta
+            self.next_id = max(self.next_id, start + len(metas))
+            self._index_changed()
+        return len(metas)
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 10,
+        embedder: Optional[TicketVectorizer] = None,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[Dict, float]]:
+        """Return list of (meta, score) for top_k matches for the query text.
+
+        `filters` keeps only items whose metadata (or raw source record)
+        equals every given field. Results are cached by normalized query,
+        top_k, filters and index version.
+        """
         if self.index is None:
             return []
+        version = self.version
+        key = (
+            _normalize_query(query),
+            top_k,
+            # JSON so list/dict filter values are hashable too
+            json.dumps(filters or {}, sort_keys=True),
+            version,
+        )
+        cached = self.cache.get(key)
+        if cached is not None:
+            return list(cached)
+        results = self._search_uncached(query, top_k, embedder, filters)
+        # Don't cache results computed against an index replaced mid-search
+        if version == self.version:
+            self.cache.put(key, tuple(results))
+        return results
+
+    def _search_uncached(
+        self,
+        query: str,
+        top_k: int,
+        embedder: Optional[TicketVectorizer],
+        filters: Optional[Dict[str, Any]],
+    ) -> List[Tuple[Dict, float]]:
+        index, id_to_meta, projection = self._snapshot()
+        if index is None:
+            return []
         if embedder is None:
             embedder = TicketVectorizer()
-        q_emb = embedder.encode(query)
-        q = np.array([q_emb]).astype('float32')
+        q = apply_projection(projection, _embed_queries(embedder, [query]))
+        # Over-fetch when filtering so enough matches survive
+        k = top_k
+        if filters:
+            k = min(max(top_k * 4, top_k + 32), max(top_k, int(index.ntotal)))
         # If embeddings were normalized, use inner product for cosine
-        D, I = self.index.search(q, top_k)
+        D, I = index.search(q, k)
         results = []
         for score, idx in zip(D[0].tolist(), I[0].tolist()):
             if idx < 0:
                 continue
-            meta = self.id_to_meta.get(str(idx)) or self.id_to_meta.get(idx)
+            meta = id_to_meta.get(str(idx)) or id_to_meta.get(idx)
+            if filters and not _meta_matches(meta, filters):
+                continue
             results.append((meta, float(score)))
+        return results[:top_k]
+
+    def search_batch(
+        self,
+        queries: List[str],
+        top_k: int = 10,
+        embedder: Optional[TicketVectorizer] = None,
+    ) -> List[List[Tuple[Dict, float]]]:
+        """Search many queries with one batched encode and one index lookup."""
+        index, id_to_meta, projection = self._snapshot()
+        if index is None or not queries:
+            return [[] for _ in queries]
+        if embedder is None:
+            embedder = TicketVectorizer()
+        q = apply_projection(projection, _embed_queries(embedder, list(queries)))
+        D, I = index.search(q, top_k)
+        results = []
+        for scores, ids in zip(D.tolist(), I.tolist()):
+            hits = []
+            for score, idx in zip(scores, ids):
+                if idx < 0:
+                    continue
+                meta = id_to_meta.get(str(idx)) or id_to_meta.get(idx)
+                hits.append((meta, float(score)))
+            results.append(hits)
         return results
@@ -0,0 +1,339 @@
+"""
+Sharded FAISS search with parallel scatter-gather.
+
+A corpus too large for one comfortable index is split into N shards, each a
+FAISS index over a subset of the vectors plus the global ids of those
+vectors. `ShardedIndex` searches every shard in parallel threads (FAISS
+releases the GIL while searching) and merges the per-shard top-k into a
+global top-k. It exposes the same `d`, `ntotal` and `search(q, k)` surface
+as a FAISS index, so `FaissIndexManager` uses it transparently.
+
+The layout is described by a JSON manifest next to the shard files:
+
+    {
+      "version": 1,
+      "dim": 384,
+      "metric": "ip",
+      "partition": "hash",            # or "attribute"
+      "attribute": null,              # field name for attribute partitioning
+      "meta": "faiss_meta.json",
+      "projection": null,             # PCA file applied to queries, if any
+      "shards": [
+        {"name": "shard-0", "index": "shard-0.index", "ids": "shard-0.ids.npy",
+         "count": 1234, "address": null},
+        ...
+      ]
+    }
+
+A shard with an `address` ("host:port" or a Unix socket path) is queried
+over IPC instead of being loaded locally; start it with
+
+    python -m src.faiss_shards serve --manifest data/faiss_shards/manifest.json --shard shard-1
+
+The IPC channel unpickles what it receives, so it must only be reachable
+by trusted peers. TCP addresses require a shared secret in
+TICKET_SHARD_AUTHKEY (on the server and the API); Unix sockets, protected
+by file permissions, fall back to a default key when it is unset.
+"""
+import argparse
+import json
+import os
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import Client, Listener
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+try:
+    import faiss
+except Exception:
+    faiss = None  # type: ignore
+
+MANIFEST_VERSION = 1
+_DEFAULT_UNIX_AUTHKEY = b"ticket-shards"
+
+
+def shard_of(key, num_shards: int) -> int:
+    """Stable shard number for a key (same result across processes and runs)."""
+    return zlib.crc32(str(key).encode("utf-8")) % num_shards
+
+
+def partition(
+    metas: Sequence[Dict],
+    num_shards: int,
+    attribute: Optional[str] = None,
+) -> List[int]:
+    """Assign each item to a shard by hash of its id or of one attribute.
+
+    With `attribute`, all items sharing a value (e.g. a product) land on the
+    same shard; the value is looked up in the item's metadata and then in
+    its raw source record.
+    """
+    assignments = []
+    for i, meta in enumerate(metas):
+        if attribute:
+            key = meta.get(attribute)
+            if key is None:
+                key = (meta.get("raw") or {}).get(attribute)
+        else:
+            key = meta.get("orig_id")
+            if key is None:
+                key = i
+        assignments.append(shard_of(key, num_shards))
+    return assignments
+
+
+def _parse_address(address: str) -> Union[str, Tuple[str, int]]:
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit() and "/" not in address:
+        return host, int(port)
+    return address
+
+
+def _authkey(address) -> bytes:
+    """Shard IPC key for a parsed address; TCP requires TICKET_SHARD_AUTHKEY."""
+    secret = os.environ.get("TICKET_SHARD_AUTHKEY")
+    if secret:
+        return secret.encode()
+    if isinstance(address, tuple):
+        raise RuntimeError(
+            f"set TICKET_SHARD_AUTHKEY to a shared secret to serve or query shards over TCP ({address[0]}:{address[1]})"
+        )
+    return _DEFAULT_UNIX_AUTHKEY
+
+
+class LocalShard:
+    """A FAISS index over part of the corpus, returning global ids."""
+
+    def __init__(self, name: str, index, ids: np.ndarray):
+        self.name = name
+        self.index = index
+        self.ids = np.asarray(ids, dtype="int64")
+
+    @property
+    def ntotal(self) -> int:
+        return int(self.index.ntotal)
+
+    def search(self, q: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        if self.ntotal == 0:
+            # Normal for attribute partitioning or a small corpus
+            return np.full((q.shape[0], k), -np.inf, dtype="float32"), np.full((q.shape[0], k), -1, dtype="int64")
+        D, I = self.index.search(q, min(k, self.ntotal))
+        # Translate local row numbers to global ids, keeping -1 for "no hit"
+        ids = np.full(I.shape, -1, dtype="int64")
+        hit = I >= 0
+        ids[hit] = self.ids[I[hit]]
+        return D, ids
+
+
+class RemoteShard:
+    """A shard served by another local process (see `serve_shard`)."""
+
+    def __init__(self, name: str, address: str, count: int = 0):
+        self.name = name
+        self.address = address
+        self.count = count
+        self._conn = None
+        self._lock = threading.Lock()
+
+    @property
+    def ntotal(self) -> int:
+        return self.count
+
+    def search(self, q: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._conn is None:
+                        address = _parse_address(self.address)
+                        self._conn = Client(address, authkey=_authkey(address))
+                    self._conn.send(("search", q, k))
+                    return self._conn.recv()
+                except (EOFError, OSError):
+                    # Shard process restarted: reconnect once
+                    self._conn = None
+                    if attempt:
+                        raise
+
+
+class ShardedIndex:
+    """Scatter a query to every shard in parallel and merge the top-k.
+
+    Args:
+        shards: LocalShard/RemoteShard objects
+        dim: Vector dimension
+        metric: "ip" (higher is better) or "l2" (lower is better)
+    """
+
+    def __init__(self, shards: List, dim: int, metric: str = "ip"):
+        self.shards = shards
+        self.d = dim
+        self.metric = metric
+        self._pool = ThreadPoolExecutor(max_workers=max(1, len(shards)), thread_name_prefix="faiss-shard")
+
+    @property
+    def ntotal(self) -> int:
+        return sum(s.ntotal for s in self.shards)
+
+    def search(self, q: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        q = np.ascontiguousarray(q, dtype="float32")
+        parts = list(self._pool.map(lambda s: s.search(q, k), self.shards))
+        return merge_topk(parts, k, higher_is_better=self.metric == "ip")
+
+
+def merge_topk(
+    parts: List[Tuple[np.ndarray, np.ndarray]],
+    k: int,
+    higher_is_better: bool = True,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Merge per-shard (D, I) results into a global (D, I) of width k.
+
+    Missing hits (id -1) sort last; rows with fewer than k hits are padded
+    with -1 ids like FAISS does.
+    """
+    nq = parts[0][0].shape[0] if parts else 0
+    D = np.concatenate([p[0] for p in parts], axis=1) if parts else np.zeros((0, 0), "float32")
+    I = np.concatenate([p[1] for p in parts], axis=1) if parts else np.zeros((0, 0), "int64")
+    worst = -np.inf if higher_is_better else np.inf
+    keyed = np.where(I >= 0, D, worst)
+    order = np.argsort(-keyed if higher_is_better else keyed, axis=1, kind="stable")[:, :k]
+    out_D = np.take_along_axis(keyed, order, axis=1)
+    out_I = np.take_along_axis(I, order, axis=1)
+    if out_I.shape[1] < k:
+        pad = k - out_I.shape[1]
+        out_D = np.pad(out_D, ((0, 0), (0, pad)), constant_values=worst)
+        out_I = np.pad(out_I, ((0, 0), (0, pad)), constant_values=-1)
+    return out_D.reshape(nq, k).astype("float32"), out_I.reshape(nq, k).astype("int64")
+
+
+def build_sharded(embeddings: np.ndarray, assignments: Sequence[int], num_shards: int) -> ShardedIndex:
+    """Build in-memory flat inner-product shards from embeddings."""
+    if faiss is None:
+        raise RuntimeError("faiss is not installed or failed to import")
+    embeddings = np.ascontiguousarray(embeddings, dtype="float32")
+    assignments = np.asarray(assignments)
+    dim = embeddings.shape[1]
+    shards = []
+    for n in range(num_shards):
+        ids = np.nonzero(assignments == n)[0]
+        index = faiss.IndexFlatIP(dim)
+        if len(ids):
+            index.add(embeddings[ids])
+        shards.append(LocalShard(f"shard-{n}", index, ids))
+    return ShardedIndex(shards, dim)
+
+
+def save_manifest(
+    sharded: ShardedIndex,
+    manifest_path: str,
+    meta_file: str,
+    attribute: Optional[str] = None,
+    projection: Optional[str] = None,
+):
+    """Write each local shard's index and id map plus the manifest."""
+    if faiss is None:
+        raise RuntimeError("faiss not available")
+    base = Path(manifest_path).parent
+    base.mkdir(parents=True, exist_ok=True)
+    entries = []
+    for shard in sharded.shards:
+        if not isinstance(shard, LocalShard):
+            raise RuntimeError(f"cannot save remote shard {shard.name}")
+        faiss.write_index(shard.index, str(base / f"{shard.name}.index"))
+        np.save(base / f"{shard.name}.ids.npy", shard.ids)
+        entries.append({
+            "name": shard.name,
+            "index": f"{shard.name}.index",
+            "ids": f"{shard.name}.ids.npy",
+            "count": shard.ntotal,
+            "address": None,
+        })
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "dim": sharded.d,
+        "metric": sharded.metric,
+        "partition": "attribute" if attribute else "hash",
+        "attribute": attribute,
+        "meta": meta_file,
+        "projection": projection,
+        "shards": entries,
+    }
+    with open(manifest_path, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2)
+
+
+def read_manifest(manifest_path: str) -> Dict:
+    with open(manifest_path, "r", encoding="utf-8") as fh:
+        manifest = json.load(fh)
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise RuntimeError(f"unsupported shard manifest version: {manifest.get('version')}")
+    return manifest
+
+
+def _load_local_shard(base: Path, entry: Dict) -> LocalShard:
+    index = faiss.read_index(str(base / entry["index"]))
+    return LocalShard(entry["name"], index, np.load(base / entry["ids"]))
+
+
+def load_manifest(manifest_path: str) -> ShardedIndex:
+    """Open every shard in a manifest, connecting to remote ones lazily."""
+    if faiss is None:
+        raise RuntimeError("faiss not available")
+    manifest = read_manifest(manifest_path)
+    base = Path(manifest_path).parent
+    shards = []
+    for entry in manifest["shards"]:
+        if entry.get("address"):
+            shards.append(RemoteShard(entry["name"], entry["address"], entry.get("count", 0)))
+        else:
+            shards.append(_load_local_shard(base, entry))
+    return ShardedIndex(shards, manifest["dim"], manifest.get("metric", "ip"))
+
+
+def serve_shard(manifest_path: str, shard_name: str, address: Optional[str] = None):
+    """Load one shard of a manifest and answer search requests over IPC."""
+    if faiss is None:
+        raise RuntimeError("faiss not available")
+    manifest = read_manifest(manifest_path)
+    entry = next((e for e in manifest["shards"] if e["name"] == shard_name), None)
+    if entry is None:
+        raise SystemExit(f"shard {shard_name} not in {manifest_path}")
+    address = address or entry.get("address")
+    if not address:
+        raise SystemExit("no address given and none set in the manifest")
+    listen_address = _parse_address(address)
+    authkey = _authkey(listen_address)
+    shard = _load_local_shard(Path(manifest_path).parent, entry)
+    print(f"Serving {shard_name} ({shard.ntotal} vectors) on {address}")
+
+    def handle(conn):
+        with conn:
+            while True:
+                try:
+                    op, q, k = conn.recv()
+                except EOFError:
+                    return
+                conn.send(shard.search(q, k) if op == "search" else None)
+
+    with Listener(listen_address, authkey=authkey) as listener:
+        while True:
+            conn = listener.accept()
+            threading.Thread(target=handle, args=(conn,), daemon=True).start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FAISS shard utilities")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="Serve one shard of a manifest over IPC")
+    serve.add_argument("--manifest", required=True, help="Path to the shard manifest JSON")
+    serve.add_argument("--shard", required=True, help="Shard name from the manifest")
+    serve.add_argument("--address", help="host:port or Unix socket path (default: from manifest)")
+    args = parser.parse_args()
+    if args.command == "serve":
+        serve_shard(args.manifest, args.shard, args.address)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+"""
+Registry of named vector collections that load lazily and share a memory budget.
+
+One server can host several indexes (`articles`, `tickets`, per-product
+knowledge bases) without loading them all at startup. Each collection is
+registered with a source and is only loaded on its first search:
+
+    registry = IndexRegistry(memory_budget=2 * 2**30)
+    registry.register_path(
+        "tickets", "data/ticket_embeddings.npy",
+        meta_path="data/ticket_embeddings_meta.json", index_factory="HNSW32",
+    )
+    registry.register_path("kb-mail", "data/indexes/mail")      # snapshot root
+    hits = registry.search("tickets", "printer offline", top_k=5, embedder=vec)
+
+Supported sources (see `register_path`):
+  - a snapshot root directory with a CURRENT pointer (src/index_snapshots.py)
+  - a snapshot directory, or a shard manifest JSON (src/faiss_shards.py)
+  - a `.index` file plus a metadata JSON
+  - a `.npy` of embeddings: either a 2-D array or a pickled {id: vector}
+    dict as written by `python -m src.vectorize`; the index is built at
+    load time with `faiss.index_factory` (e.g. "Flat", "HNSW32"). Pass the
+    `_meta.json` vectorize writes alongside as `meta_path`, or hits carry
+    only their ids
+
+Each collection may set its own memory budget (loading fails if it is
+exceeded). When the resident collections together exceed the registry's
+budget, the least recently used ones are dropped; they reload on next use.
+Searches already running keep the evicted index alive until they finish.
+"""
+import itertools
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+try:
+    import faiss
+except Exception:
+    faiss = None  # type: ignore
+
+from src.faiss_index import FaissIndexManager
+from src.faiss_shards import LocalShard, ShardedIndex
+from src.index_snapshots import CURRENT_FILE, SnapshotStore, load_snapshot
+
+
+# Metadata entries serialized to estimate the size of the whole mapping
+META_SAMPLE = 100
+
+
+def index_memory_bytes(index) -> int:
+    """Estimate the resident size of a FAISS (or sharded) index.
+
+    Derived from vector counts and code sizes instead of serializing the
+    index, which would briefly hold a second copy of it in memory.
+    """
+    if index is None:
+        return 0
+    if isinstance(index, ShardedIndex):
+        # Remote shards live in other processes
+        return sum(index_memory_bytes(s.index) for s in index.shards if isinstance(s, LocalShard))
+    try:
+        index = faiss.downcast_index(index)
+        ntotal = int(index.ntotal)
+        if hasattr(index, "hnsw"):
+            hnsw = index.hnsw
+            links = hnsw.neighbors.size() * 4 + hnsw.levels.size() * 4 + hnsw.offsets.size() * 8
+            return int(links) + index_memory_bytes(index.storage)
+        if hasattr(index, "index"):
+            # IDMap / PreTransform wrappers around the index holding the codes
+            ids = ntotal * 8 if hasattr(index, "id_map") else 0
+            return ids + index_memory_bytes(index.index)
+        size = ntotal * int(getattr(index, "code_size", None) or index.d * 4)
+        if hasattr(index, "invlists"):
+            size += ntotal * 8 + index_memory_bytes(index.quantizer)
+        return size
+    except Exception:
+        return int(index.ntotal) * int(index.d) * 4
+
+
+def manager_memory_bytes(manager: FaissIndexManager) -> int:
+    """Index plus (estimated) metadata size of a loaded manager."""
+    metas = manager.id_to_meta
+    sample = list(itertools.islice(metas.values(), META_SAMPLE))
+    meta_bytes = 0
+    if sample:
+        sample_bytes = len(json.dumps(sample, ensure_ascii=False, default=str).encode("utf-8"))
+        meta_bytes = sample_bytes * len(metas) // len(sample)
+    return index_memory_bytes(manager.index) + meta_bytes
+
+
+def load_embeddings(
+    npy_path: str,
+    meta_path: Optional[str] = None,
+    index_factory: str = "Flat",
+) -> FaissIndexManager:
+    """Build an inner-product index from saved embeddings.
+
+    `npy_path` holds a 2-D array, or a pickled {id: vector} dict from
+    `TicketVectorizer.encode_tickets`. `meta_path` optionally maps ids
+    (or row numbers) to metadata dicts; otherwise each hit carries its id.
+    """
+    if faiss is None:
+        raise RuntimeError("faiss is not installed or failed to import")
+    data = np.load(npy_path, allow_pickle=True)
+    if data.dtype == object and data.shape == ():
+        mapping = data.item()
+        ids = list(mapping.keys())
+        vectors = np.stack([np.asarray(mapping[i], dtype="float32") for i in ids]) if ids else None
+    else:
+        vectors = np.asarray(data, dtype="float32")
+        ids = list(range(len(vectors)))
+    if vectors is None or vectors.ndim != 2 or not len(vectors):
+        raise RuntimeError(f"no embeddings found in {npy_path}")
+
+    extra: Dict[str, Dict] = {}
+    if meta_path:
+        with open(meta_path, "r", encoding="utf-8") as fh:
+            extra = json.load(fh)
+
+    vectors = np.ascontiguousarray(vectors)
+    index = faiss.index_factory(vectors.shape[1], index_factory, faiss.METRIC_INNER_PRODUCT)
+    if not index.is_trained:
+        index.train(vectors)
+    index.add(vectors)
+
+    manager = FaissIndexManager()
+    manager.index = index
+    manager.dim = vectors.shape[1]
+    manager.id_to_meta = {
+        row: extra.get(str(orig_id)) or {"orig_id": orig_id, "title": None, "snippet": None}
+        for row, orig_id in enumerate(ids)
+    }
+    manager.next_id = len(ids)
+    manager._index_changed()
+    return manager
+
+
+def path_loader(
+    path: str,
+    meta_path: Optional[str] = None,
+    index_factory: str = "Flat",
+) -> Callable[[], FaissIndexManager]:
+    """Return a loader for a collection stored at `path` (kind detected from the path)."""
+    source = Path(path)
+
+    def load() -> FaissIndexManager:
+        if source.is_dir() and (source / CURRENT_FILE).exists():
+            store = SnapshotStore(str(source))
+            return load_snapshot(store.path(store.current()))
+        if source.is_dir():
+            return load_snapshot(source)
+        if source.suffix == ".json":
+            manager = FaissIndexManager()
+            manager.load_sharded(str(source))
+            return manager
+        if source.suffix == ".npy":
+            return load_embeddings(str(source), meta_path, index_factory)
+        manager = FaissIndexManager()
+        manager.load(str(source), meta_path or str(source.with_name(source.stem + "_meta.json")))
+        return manager
+
+    return load
+
+
+class Collection:
+    """One named collection: how to load it, its budget and its stats."""
+
+    def __init__(
+        self,
+        name: str,
+        loader: Callable[[], Any],
+        memory_budget: Optional[int] = None,
+        pinned: bool = False,
+    ):
+        self.name = name
+        self.loader = loader
+        self.memory_budget = memory_budget
+        # Pinned collections are resolved through `loader` on every use and
+        # never evicted (e.g. the API's live articles manager)
+        self.pinned = pinned
+        self.manager = None
+        self.memory_bytes = 0
+        self.last_used = 0.0
+        self.loads = 0
+        self.load_seconds = 0.0
+        self.load_error: Optional[str] = None
+        self.evictions = 0
+        self.searches = 0
+        self.search_seconds = 0.0
+        self.lock = threading.Lock()
+        self.stats_lock = threading.Lock()
+
+    def stats(self) -> Dict[str, Any]:
+        manager = self.loader() if self.pinned else self.manager
+        index = getattr(manager, "index", None)
+        cache = getattr(manager, "cache", None)
+        return {
+            "loaded": index is not None,
+            "pinned": self.pinned,
+            "vectors": int(index.ntotal) if hasattr(index, "ntotal") else 0,
+            "memory_bytes": self.memory_bytes,
+            "memory_budget": self.memory_budget,
+            "loads": self.loads,
+            "last_load_seconds": self.load_seconds,
+            "load_error": self.load_error,
+            "evictions": self.evictions,
+            "searches": self.searches,
+            "avg_search_ms": (self.search_seconds / self.searches * 1000) if self.searches else 0.0,
+            "last_used": self.last_used or None,
+            "cache": cache.stats() if cache is not None else None,
+        }
+
+
+class IndexRegistry:
+    """Named collections loaded on first use and evicted LRU over `memory_budget`.
+
+    Args:
+        memory_budget: Bytes all non-pinned resident collections may use
+            together; None means no limit
+    """
+
+    def __init__(self, memory_budget: Optional[int] = None):
+        self.memory_budget = memory_budget
+        self._collections: Dict[str, Collection] = {}
+        self._lock = threading.Lock()
+
+    def register(
+        self,
+        name: str,
+        loader: Callable[[], Any],
+        memory_budget: Optional[int] = None,
+        pinned: bool = False,
+    ):
+        """Register (or replace) a collection; nothing is loaded yet."""
+        with self._lock:
+            self._collections[name] = Collection(name, loader, memory_budget, pinned)
+
+    def register_path(
+        self,
+        name: str,
+        path: str,
+        meta_path: Optional[str] = None,
+        index_factory: str = "Flat",
+        memory_budget: Optional[int] = None,
+    ):
+        """Register a collection stored on disk (see `path_loader`)."""
+        self.register(name, path_loader(path, meta_path, index_factory), memory_budget)
+
+    def load_config(self, config_path: str):
+        """Register every collection in a JSON config file.
+
+        Format: {"name": {"path": ..., "meta": ..., "index_factory": "Flat",
+        "memory_mb": 512}, ...}; relative paths are resolved against the
+        config file's directory.
+        """
+        base = Path(config_path).parent
+        with open(config_path, "r", encoding="utf-8") as fh:
+            config = json.load(fh)
+        for name, spec in config.items():
+            meta = spec.get("meta")
+            memory_mb = spec.get("memory_mb")
+            self.register_path(
+                name,
+                str(base / spec["path"]),
+                meta_path=str(base / meta) if meta else None,
+                index_factory=spec.get("index_factory", "Flat"),
+                memory_budget=int(memory_mb * 2**20) if memory_mb else None,
+            )
+
+    def names(self) -> List[str]:
+        return sorted(self._collections)
+
+    def _collection(self, name: str) -> Collection:
+        collection = self._collections.get(name)
+        if collection is None:
+            raise KeyError(f"unknown collection: {name}")
+        return collection
+
+    def get(self, name: str):
+        """Return the collection's manager, loading it first if needed."""
+        collection = self._collection(name)
+        collection.last_used = time.time()
+        if collection.pinned:
+            return collection.loader()
+        manager = collection.manager
+        if manager is not None:
+            return manager
+        with collection.lock:
+            # Another request may have loaded it while we waited
+            if collection.manager is None:
+                self._load(collection)
+            manager = collection.manager
+        self._evict_over_budget(keep=name)
+        return manager
+
+    def _load(self, collection: Collection):
+        start = time.perf_counter()
+        try:
+            manager = collection.loader()
+            size = manager_memory_bytes(manager)
+            if collection.memory_budget is not None and size > collection.memory_budget:
+                raise RuntimeError(
+                    f"collection {collection.name} needs {size} bytes; its budget is {collection.memory_budget}"
+                )
+        except Exception as e:
+            collection.load_error = str(e)
+            raise
+        collection.load_seconds = time.perf_counter() - start
+        collection.loads += 1
+        collection.load_error = None
+        collection.memory_bytes = size
+        collection.manager = manager
+        print(f"Loaded collection {collection.name} ({size / 2**20:.1f} MB) in {collection.load_seconds:.2f}s.")
+
+    def _evict_over_budget(self, keep: Optional[str] = None):
+        if self.memory_budget is None:
+            return
+        with self._lock:
+            resident = [c for c in self._collections.values() if c.manager is not None and not c.pinned]
+            total = sum(c.memory_bytes for c in resident)
+            for collection in sorted(resident, key=lambda c: c.last_used):
+                if total <= self.memory_budget:
+                    break
+                if collection.name == keep:
+                    continue
+                total -= collection.memory_bytes
+                self.evict(collection.name)
+
+    def evict(self, name: str) -> bool:
+        """Drop a loaded collection from memory; it reloads on next use."""
+        collection = self._collection(name)
+        if collection.pinned or collection.manager is None:
+            return False
+        collection.manager = None
+        collection.memory_bytes = 0
+        collection.evictions += 1
+        print(f"Evicted collection {name} from memory.")
+        return True
+
+    def search(self, name: str, query: str, top_k: int = 10, **kwargs) -> List[Tuple[Dict, float]]:
+        """Search one collection (loading it if needed), recording stats."""
+        manager = self.get(name)
+        collection = self._collection(name)
+        start = time.perf_counter()
+        try:
+            return manager.search(query, top_k=top_k, **kwargs)
+        finally:
+            with collection.stats_lock:
+                collection.searches += 1
+                collection.search_seconds += time.perf_counter() - start
+
+    def stats(self) -> Dict[str, Any]:
+        collections = {name: c.stats() for name, c in sorted(self._collections.items())}
+        return {
+            "memory_budget": self.memory_budget,
+            "memory_bytes": sum(c["memory_bytes"] for c in collections.values() if not c["pinned"]),
+            "collections": collections,
+        }
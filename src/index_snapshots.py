@@ -0,0 +1,296 @@
+"""
+Versioned FAISS index snapshots and zero-downtime hot-swapping.
+
+Snapshots live in one directory per version under a root, with pointer
+files naming the live and the previously live version:
+
+    data/indexes/
+      CURRENT                  -> "v20261018-142501"
+      PREVIOUS                 -> "v20261017-093000"
+      v20261017-093000/faiss.index, faiss_meta.json
+      v20261018-142501/manifest.json, shard-*.index, ...   (sharded)
+
+`IndexHotSwapper` loads a snapshot into a fresh `FaissIndexManager` off
+the request path, smoke-tests it, and then swaps it into the live manager
+with `FaissIndexManager.swap_from`. Searches already running finish on the
+old index. The replaced index stays in memory so `rollback()` is instant.
+
+The CURRENT pointer is the only way to publish a version: `activate` and
+`SnapshotStore.rollback` rewrite it (even when it already names that
+version), and every server process's `watch()` thread sees the rewrite
+and swaps its own index. With preforked workers (`server.py --workers N`)
+each worker has its own live manager, so this is what keeps them all on
+the same version; `status()` describes only the process that answers.
+"""
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.faiss_index import FaissIndexManager
+
+CURRENT_FILE = "CURRENT"
+PREVIOUS_FILE = "PREVIOUS"
+
+
+class SnapshotStore:
+    """Directory of versioned index snapshots with CURRENT/PREVIOUS pointers."""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def versions(self) -> List[str]:
+        if not self.root.exists():
+            return []
+        return sorted(p.name for p in self.root.iterdir() if p.is_dir() and is_snapshot_dir(p))
+
+    def path(self, version: str) -> Path:
+        return self.root / version
+
+    def new_version_dir(self) -> Path:
+        """Create and return an empty directory for a new snapshot."""
+        stamp = time.strftime("v%Y%m%d-%H%M%S")
+        path = self.root / stamp
+        n = 1
+        while path.exists():
+            n += 1
+            path = self.root / f"{stamp}-{n}"
+        path.mkdir(parents=True)
+        return path
+
+    def _read_pointer(self, name: str) -> Optional[str]:
+        try:
+            value = (self.root / name).read_text(encoding="utf-8").strip()
+        except OSError:
+            return None
+        return value or None
+
+    def _write_pointer(self, name: str, version: Optional[str]):
+        # Write-then-rename so readers never see a half-written pointer
+        tmp = self.root / f".{name}.tmp"
+        tmp.write_text(version or "", encoding="utf-8")
+        os.replace(tmp, self.root / name)
+
+    def current(self) -> Optional[str]:
+        return self._read_pointer(CURRENT_FILE)
+
+    def previous(self) -> Optional[str]:
+        return self._read_pointer(PREVIOUS_FILE)
+
+    def activate(self, version: str):
+        """Point CURRENT at `version`, remembering the old one as PREVIOUS.
+
+        CURRENT is always rewritten, so watchers reload even if it already
+        named `version`.
+        """
+        if not is_snapshot_dir(self.path(version)):
+            raise FileNotFoundError(f"no index snapshot named {version} in {self.root}")
+        old = self.current()
+        if old and old != version:
+            self._write_pointer(PREVIOUS_FILE, old)
+        self._write_pointer(CURRENT_FILE, version)
+
+    def rollback(self) -> str:
+        """Point CURRENT back at PREVIOUS; returns the version now current."""
+        previous = self.previous()
+        if not previous:
+            raise RuntimeError("no previous snapshot to roll back to")
+        self.activate(previous)
+        return previous
+
+    def pointer_token(self) -> Optional[tuple]:
+        """Changes on every rewrite of CURRENT (each write renames a new file)."""
+        try:
+            st = (self.root / CURRENT_FILE).stat()
+        except OSError:
+            return None
+        return (st.st_ino, st.st_mtime_ns)
+
+
+def is_snapshot_dir(path: Path) -> bool:
+    return (path / "manifest.json").exists() or (
+        (path / "faiss.index").exists() and (path / "faiss_meta.json").exists()
+    )
+
+
+def save_snapshot(manager: FaissIndexManager, path: Path):
+    """Write a manager's index into a snapshot directory (flat or sharded)."""
+    from src.faiss_shards import ShardedIndex
+
+    if isinstance(manager.index, ShardedIndex):
+        manager.save_sharded(str(path / "manifest.json"))
+    else:
+        manager.save(str(path / "faiss.index"), str(path / "faiss_meta.json"))
+
+
+def load_snapshot(path: Path) -> FaissIndexManager:
+    """Load a snapshot directory into a new, detached manager."""
+    manager = FaissIndexManager(cache_size=0)
+    if (path / "manifest.json").exists():
+        manager.load_sharded(str(path / "manifest.json"))
+    else:
+        manager.load(str(path / "faiss.index"), str(path / "faiss_meta.json"))
+    return manager
+
+
+SMOKE_QUERY = "Cannot log in after password reset"
+
+
+def smoke_test(manager: FaissIndexManager, embedder=None):
+    """Raise if a freshly loaded index can't answer a search.
+
+    With `embedder` (the one live queries use), checks that its vectors
+    have the dimension the snapshot expects (the projection's input
+    dimension, or the index's) and runs a real `manager.search`, so the
+    projection and query path are exercised exactly as in production.
+    Without it, searches with a probe in the index's own dimension. Either
+    way the hit must map back to metadata, which also catches empty indexes
+    and index/metadata files from different builds.
+    """
+    index = manager.index
+    if index is None or int(index.ntotal) == 0:
+        raise RuntimeError("snapshot index is empty")
+    if len(manager.id_to_meta) < int(index.ntotal):
+        raise RuntimeError(
+            f"snapshot metadata has {len(manager.id_to_meta)} entries for {int(index.ntotal)} vectors"
+        )
+    if embedder is None:
+        probe = np.ones((1, index.d), dtype="float32") / np.sqrt(index.d)
+        D, I = index.search(probe, 1)
+        idx = int(I[0][0])
+        if idx < 0:
+            raise RuntimeError("snapshot search returned no hits")
+        if manager.id_to_meta.get(str(idx)) is None and manager.id_to_meta.get(idx) is None:
+            raise RuntimeError(f"snapshot hit {idx} has no metadata")
+        return
+
+    expected = int(manager.projection.d_in) if manager.projection is not None else int(index.d)
+    query_dim = int(np.asarray(embedder.encode(SMOKE_QUERY)).shape[-1])
+    if query_dim != expected:
+        raise RuntimeError(
+            f"snapshot expects {expected}-d query vectors but the live embedder produces {query_dim}-d"
+        )
+    try:
+        hits = manager.search(SMOKE_QUERY, top_k=1, embedder=embedder)
+    except Exception as e:
+        raise RuntimeError(f"snapshot search failed: {type(e).__name__}: {e}") from e
+    if not hits:
+        raise RuntimeError("snapshot search returned no hits")
+    if hits[0][0] is None:
+        raise RuntimeError("snapshot hit has no metadata")
+
+
+class IndexHotSwapper:
+    """Load, verify and atomically activate index snapshots for a live manager."""
+
+    def __init__(self, manager: FaissIndexManager, store: SnapshotStore, embedder=None):
+        self.manager = manager
+        self.store = store
+        # Live query embedder used to smoke-test candidates (see smoke_test)
+        self.embedder = embedder
+        self.live_version: Optional[str] = None
+        self.previous_version: Optional[str] = None
+        self._previous: Optional[FaissIndexManager] = None
+        self._reload_lock = threading.Lock()
+        self.loading: Optional[str] = None
+        self.last_error: Optional[str] = None
+        self.last_swap_at: Optional[float] = None
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def reload(self, version: Optional[str] = None, probe_only: bool = False) -> str:
+        """Load `version` (default: CURRENT), smoke-test it and swap it in.
+
+        Blocks while loading, but the live index keeps serving throughout;
+        the swap itself is a pointer exchange. Only this process's manager
+        changes; publish a version to all workers with `store.activate`.
+        `probe_only` skips the embedder in the smoke test, for loads that
+        must not run model inference (e.g. before preforking).
+        Returns the version swapped in.
+        """
+        with self._reload_lock:
+            version = version or self.store.current()
+            if not version:
+                raise FileNotFoundError(f"no CURRENT snapshot in {self.store.root}")
+            self.loading = version
+            try:
+                candidate = load_snapshot(self.store.path(version))
+                smoke_test(candidate, None if probe_only else self.embedder)
+            except Exception as e:
+                self.last_error = f"{version}: {e}"
+                raise
+            finally:
+                self.loading = None
+            self._previous = self.manager.swap_from(candidate)
+            self.previous_version, self.live_version = self.live_version, version
+            self.last_error = None
+            self.last_swap_at = time.time()
+            return version
+
+    def rollback(self) -> str:
+        """Swap the previously live index back in (no disk reload)."""
+        with self._reload_lock:
+            if self._previous is None or self._previous.index is None:
+                raise RuntimeError("no previous index to roll back to")
+            self._previous = self.manager.swap_from(self._previous)
+            self.previous_version, self.live_version = self.live_version, self.previous_version
+            self.last_swap_at = time.time()
+            return self.live_version or ""
+
+    def switch_to(self, version: str) -> str:
+        """Make `version` live: instantly if it is the index we just replaced."""
+        rollback_available = self._previous is not None and self._previous.index is not None
+        if rollback_available and version == self.previous_version and version != self.live_version:
+            return self.rollback()
+        return self.reload(version)
+
+    def status(self) -> Dict:
+        index = self.manager.index
+        return {
+            "live_version": self.live_version,
+            "previous_version": self.previous_version,
+            "rollback_available": self._previous is not None and self._previous.index is not None,
+            "current_pointer": self.store.current(),
+            "watching": self.watching,
+            "versions": self.store.versions(),
+            "loading": self.loading,
+            "last_error": self.last_error,
+            "last_swap_at": self.last_swap_at,
+            "ntotal": int(index.ntotal) if index is not None else 0,
+        }
+
+    @property
+    def watching(self) -> bool:
+        return self._watcher is not None
+
+    def watch(self, interval: float = 10.0):
+        """Swap in CURRENT in the background whenever the pointer is rewritten."""
+        if self._watcher is not None:
+            return
+
+        def loop():
+            # Catch up at once if CURRENT moved before the watcher started
+            # (e.g. a worker re-forked from a parent holding an older index)
+            seen = self.store.pointer_token() if self.store.current() == self.live_version else None
+            while not self._stop.wait(interval):
+                token = self.store.pointer_token()
+                if token == seen:
+                    continue
+                seen = token
+                version = self.store.current()
+                if not version:
+                    continue
+                try:
+                    self.switch_to(version)
+                    print(f"Hot-swapped FAISS index to snapshot {version}.")
+                except Exception as e:
+                    print(f"Index hot-swap to {version} failed: {e}")
+
+        self._watcher = threading.Thread(target=loop, name="index-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop(self):
+        self._stop.set()
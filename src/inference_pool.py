@@ -0,0 +1,317 @@
+"""
+Out-of-process inference workers for the priority classifier and vectorizer.
+
+The API process can hand model work to a pool of dedicated local processes
+instead of running torch inside the web process. Each worker owns its own
+`TicketPriorityClassifier` and `TicketVectorizer` and talks to the API over
+a private duplex pipe, so:
+
+  - torch thread pools and the GIL of the workers never contend with
+    request handling in the API process,
+  - inference workers can be scaled independently of HTTP workers,
+  - a worker that crashes or is OOM-killed only fails the requests it was
+    running; it is restarted and the API keeps serving.
+
+`RemotePriorityClassifier` and `RemoteVectorizer` expose the same methods
+the API already calls, so they can be swapped in for the local classes.
+"""
+import itertools
+import multiprocessing as mp
+import signal
+import threading
+from concurrent.futures import Future
+from multiprocessing.connection import wait
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class WorkerCrashedError(RuntimeError):
+    """Raised for requests that were running on a worker that died."""
+
+
+def _fail(future: Future, exc: Exception):
+    if not future.done():
+        future.set_exception(exc)
+
+
+def _worker_main(conn, priority_model: str, vector_model: str, torch_threads: int, classifier_options: Dict):
+    """Worker loop: receive (req_id, method, args, kwargs), send results back."""
+    # Ctrl-C on the API process should shut the pool down, not crash workers.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        import torch
+
+        torch.set_num_threads(torch_threads)
+    except Exception:
+        pass
+
+    from src.priority import TicketPriorityClassifier
+    from src.vectorize import TicketVectorizer
+
+    classifier = TicketPriorityClassifier(model_name=priority_model, **classifier_options)
+    vectorizer = None
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+        req_id, method, args, kwargs = message
+        try:
+            if method == "encode":
+                if vectorizer is None:
+                    vectorizer = TicketVectorizer(model_name=vector_model)
+                result = vectorizer.encode(*args, **kwargs)
+            elif method == "encode_document":
+                if vectorizer is None:
+                    vectorizer = TicketVectorizer(model_name=vector_model)
+                result = vectorizer.encode_document(*args, **kwargs)
+            elif method == "encode_documents":
+                if vectorizer is None:
+                    vectorizer = TicketVectorizer(model_name=vector_model)
+                result = vectorizer.encode_documents(*args, **kwargs)
+            elif method == "classify":
+                result = classifier.classify(*args, **kwargs)
+            elif method == "get_priority":
+                result = classifier.get_priority(*args, **kwargs)
+            elif method == "classify_batch":
+                result = classifier.classify_batch(args[0])
+            elif method == "model_loaded":
+                # Status only: never triggers loading bart-large-mnli
+                result = classifier._classifier is not None
+            elif method == "tier_counts":
+                result = dict(classifier.tier_counts)
+            else:
+                raise ValueError(f"unknown inference method: {method}")
+            conn.send((req_id, True, result))
+        except Exception as e:
+            conn.send((req_id, False, f"{type(e).__name__}: {e}"))
+
+
+class _Worker:
+    def __init__(self, slot: int, process, conn):
+        self.slot = slot
+        self.process = process
+        self.conn = conn
+        self.send_lock = threading.Lock()
+        self.pending: Dict[int, Future] = {}
+
+
+class InferencePool:
+    """Pool of local inference processes reached over pipes.
+
+    Requests go to the worker with the fewest in-flight requests. A
+    background thread collects results and watches worker sentinels; when a
+    worker dies, its in-flight requests fail with `WorkerCrashedError` and
+    a replacement is started.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        priority_model: str = "facebook/bart-large-mnli",
+        vector_model: str = "all-MiniLM-L6-v2",
+        torch_threads: int = 1,
+        timeout: float = 120.0,
+        classifier_options: Optional[Dict] = None,
+    ):
+        self.num_workers = workers
+        self.priority_model = priority_model
+        self.vector_model = vector_model
+        self.torch_threads = torch_threads
+        self.classifier_options = classifier_options or {}
+        self.timeout = timeout
+        self.restarts = 0
+        self._ctx = mp.get_context("spawn")
+        self._workers: List[_Worker] = []
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._collector: Optional[threading.Thread] = None
+        self._closed = False
+
+    def _start_worker(self, slot: int) -> _Worker:
+        parent_conn, child_conn = self._ctx.Pipe(duplex=True)
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self.priority_model, self.vector_model, self.torch_threads, self.classifier_options),
+            name=f"inference-worker-{slot}",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        return _Worker(slot, process, parent_conn)
+
+    def start(self):
+        """Start the worker processes (idempotent)."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("inference pool is closed")
+            if self._workers:
+                return
+            self._workers = [self._start_worker(i) for i in range(self.num_workers)]
+            self._collector = threading.Thread(target=self._collect, name="inference-collector", daemon=True)
+            self._collector.start()
+
+    def _collect(self):
+        while not self._closed:
+            with self._lock:
+                handles: Dict[Any, Tuple[_Worker, bool]] = {}
+                for w in self._workers:
+                    handles[w.conn] = (w, False)
+                    handles[w.process.sentinel] = (w, True)
+            for ready in wait(list(handles), timeout=0.5):
+                worker, is_sentinel = handles[ready]
+                if is_sentinel:
+                    self._replace(worker)
+                    continue
+                try:
+                    req_id, ok, payload = worker.conn.recv()
+                except (EOFError, OSError):
+                    self._replace(worker)
+                    continue
+                future = worker.pending.pop(req_id, None)
+                if future is None or future.done():
+                    continue
+                if ok:
+                    future.set_result(payload)
+                else:
+                    future.set_exception(RuntimeError(payload))
+
+    def _replace(self, worker: _Worker):
+        with self._lock:
+            if self._closed or worker not in self._workers:
+                return
+            self._workers[self._workers.index(worker)] = self._start_worker(worker.slot)
+            self.restarts += 1
+        worker.conn.close()
+        exitcode = worker.process.exitcode
+        for future in list(worker.pending.values()):
+            _fail(future, WorkerCrashedError(f"inference worker {worker.slot} exited (code {exitcode})"))
+        worker.pending.clear()
+
+    def submit(self, method: str, *args, **kwargs) -> Future:
+        """Send a request to the least-loaded worker and return a Future."""
+        self.start()
+        future: Future = Future()
+        req_id = next(self._ids)
+        with self._lock:
+            worker = min(self._workers, key=lambda w: len(w.pending))
+            worker.pending[req_id] = future
+        try:
+            with worker.send_lock:
+                worker.conn.send((req_id, method, args, kwargs))
+        except (OSError, ValueError) as e:
+            worker.pending.pop(req_id, None)
+            _fail(future, WorkerCrashedError(f"inference worker {worker.slot} unavailable: {e}"))
+        return future
+
+    def call(self, method: str, *args, **kwargs):
+        """Run a request on the pool and wait for its result."""
+        return self.submit(method, *args, **kwargs).result(timeout=self.timeout)
+
+    def broadcast(self, method: str, timeout: Optional[float] = None) -> List[Any]:
+        """Run a request on every worker and return the results that arrived.
+
+        Meant for cheap status queries; workers that fail or don't answer
+        within `timeout` seconds are left out.
+        """
+        self.start()
+        futures: List[Future] = []
+        with self._lock:
+            workers = list(self._workers)
+        for worker in workers:
+            future: Future = Future()
+            req_id = next(self._ids)
+            with self._lock:
+                worker.pending[req_id] = future
+            try:
+                with worker.send_lock:
+                    worker.conn.send((req_id, method, (), {}))
+            except (OSError, ValueError):
+                worker.pending.pop(req_id, None)
+                continue
+            futures.append(future)
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result(timeout=timeout if timeout is not None else self.timeout))
+            except Exception:
+                pass
+        return results
+
+    def tier_counts(self, timeout: Optional[float] = 5.0) -> Dict[str, int]:
+        """Sum the priority classifiers' per-tier counters across workers.
+
+        Counts of a worker that crashed and was replaced are lost.
+        """
+        totals: Dict[str, int] = {}
+        for counts in self.broadcast("tier_counts", timeout=timeout):
+            for tier, n in counts.items():
+                totals[tier] = totals.get(tier, 0) + n
+        return totals
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": len(self._workers),
+                "alive": sum(1 for w in self._workers if w.process.is_alive()),
+                "in_flight": sum(len(w.pending) for w in self._workers),
+                "restarts": self.restarts,
+            }
+
+    def close(self):
+        """Stop all workers; pending requests fail with WorkerCrashedError."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            workers, self._workers = self._workers, []
+        for w in workers:
+            try:
+                with w.send_lock:
+                    w.conn.send(None)
+            except (OSError, ValueError):
+                pass
+        for w in workers:
+            w.process.join(timeout=5)
+            if w.process.is_alive():
+                w.process.terminate()
+            for future in list(w.pending.values()):
+                _fail(future, WorkerCrashedError("inference pool closed"))
+            w.conn.close()
+
+
+class RemotePriorityClassifier:
+    """Drop-in for `TicketPriorityClassifier` that runs in an InferencePool."""
+
+    def __init__(self, pool: InferencePool):
+        self.pool = pool
+        self.labels = ["low", "medium", "high"]
+
+    def classify(self, text: str) -> Dict[str, float]:
+        return self.pool.call("classify", text)
+
+    def classify_batch(self, texts: List[str]) -> List[Dict[str, float]]:
+        return self.pool.call("classify_batch", list(texts))
+
+    def get_priority(self, text: str) -> Tuple[str, float]:
+        return tuple(self.pool.call("get_priority", text))
+
+
+class RemoteVectorizer:
+    """Drop-in for `TicketVectorizer` encoding that runs in an InferencePool."""
+
+    def __init__(self, pool: InferencePool):
+        self.pool = pool
+
+    def encode(self, texts, **kwargs) -> np.ndarray:
+        return self.pool.call("encode", texts, **kwargs)
+
+    def encode_document(self, text: str, **kwargs) -> np.ndarray:
+        return self.pool.call("encode_document", text, **kwargs)
+
+    def encode_documents(self, texts, **kwargs) -> np.ndarray:
+        return self.pool.call("encode_documents", texts, **kwargs)
@@ -0,0 +1,468 @@
+"""
+Durable background jobs for bulk ticket triage.
+
+A job is a JSONL or CSV file of tickets submitted once and processed in the
+background. Everything lives in a local SQLite database:
+
+  jobs         one row per job (status, counters, options)
+  job_items    the tickets of each job, in file order
+  job_results  one JSON result per processed ticket
+
+Workers process a job in chunks and commit each chunk's results together
+with the job's progress counter, so the database is always a checkpoint:
+after a restart, jobs that were queued or running are picked up again and
+continue from the first ticket without a result.
+
+Several runners may share one database (e.g. preforked server workers). A
+claimed job is leased to its runner, which renews a heartbeat while it
+works; only jobs whose lease has gone stale are put back in the queue, and
+chunk saves from a runner that lost its lease are ignored.
+
+Uploads are stored in short transactions of `insert_batch` tickets while
+the job is `loading`, so a large import never holds the write lock for
+long. A job whose loader stopped heartbeating (the process died mid-upload)
+is marked failed.
+"""
+import csv
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Seconds without a heartbeat after which a running job's lease is stale
+DEFAULT_LEASE_TIMEOUT = 60.0
+# Longest pause of a worker thread after repeated database errors
+MAX_ERROR_BACKOFF = 30.0
+TEXT_FIELDS = ("text", "content", "body", "ticket", "description")
+ID_FIELDS = ("id", "ticket_id", "_id")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    total INTEGER NOT NULL DEFAULT 0,
+    processed INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    options TEXT NOT NULL DEFAULT '{}',
+    error TEXT,
+    owner TEXT,
+    heartbeat REAL
+);
+CREATE TABLE IF NOT EXISTS job_items (
+    job_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    ticket_id TEXT,
+    text TEXT NOT NULL,
+    PRIMARY KEY (job_id, idx)
+);
+CREATE TABLE IF NOT EXISTS job_results (
+    job_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    result TEXT NOT NULL,
+    PRIMARY KEY (job_id, idx)
+);
+"""
+
+
+def _pick(obj: Dict, fields: Iterable[str]):
+    for f in fields:
+        if obj.get(f):
+            return obj[f]
+    return None
+
+
+def iter_tickets(path: str, fmt: Optional[str] = None) -> Iterator[Tuple[Optional[str], str]]:
+    """Yield (ticket_id, text) from a JSONL or CSV file without loading it whole.
+
+    The format is taken from `fmt` or the file extension (default JSONL).
+    Rows without a text field are skipped.
+    """
+    fmt = (fmt or Path(path).suffix.lstrip(".") or "jsonl").lower()
+    with open(path, "r", encoding="utf-8", errors="replace", newline="") as fh:
+        if fmt == "csv":
+            rows: Iterable[Dict] = csv.DictReader(fh)
+        else:
+            rows = (json.loads(line) for line in fh if line.strip())
+        for row in rows:
+            text = _pick(row, TEXT_FIELDS)
+            if not text:
+                continue
+            ticket_id = _pick(row, ID_FIELDS)
+            yield (str(ticket_id) if ticket_id is not None else None), str(text)
+
+
+class JobStore:
+    """SQLite-backed job, ticket and result storage (safe across threads)."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            # Databases created before job leases lack these columns
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, kind in (("owner", "TEXT"), ("heartbeat", "REAL")):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def create_job(
+        self,
+        tickets: Iterable[Tuple[Optional[str], str]],
+        options: Optional[Dict] = None,
+        insert_batch: int = 1000,
+    ) -> str:
+        """Store the tickets of a new job and queue it. Returns the job id.
+
+        Tickets are committed `insert_batch` at a time while the job is
+        "loading" (workers ignore it until it is queued). If reading the
+        tickets fails, the partial job is removed and the error re-raised.
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, created_at, updated_at, options, heartbeat) "
+                "VALUES (?, 'loading', ?, ?, ?, ?)",
+                (job_id, now, now, json.dumps(options or {}), now),
+            )
+        total = 0
+        try:
+            rows = []
+            for ticket_id, text in tickets:
+                rows.append((job_id, total, ticket_id, text))
+                total += 1
+                if len(rows) >= insert_batch:
+                    self._insert_items(job_id, rows)
+                    rows = []
+            if rows:
+                self._insert_items(job_id, rows)
+        except BaseException:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM job_items WHERE job_id = ?", (job_id,))
+                conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+            raise
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', total = ?, updated_at = ? WHERE id = ?",
+                (total, time.time(), job_id),
+            )
+        return job_id
+
+    def _insert_items(self, job_id: str, rows: List[Tuple]):
+        """Commit one batch of a loading job's tickets and renew its heartbeat."""
+        with self._connect() as conn:
+            conn.executemany("INSERT INTO job_items VALUES (?, ?, ?, ?)", rows)
+            conn.execute("UPDATE jobs SET heartbeat = ? WHERE id = ?", (time.time(), job_id))
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["options"] = json.loads(job["options"])
+        return job
+
+    def claim_next(self, owner: Optional[str] = None) -> Optional[str]:
+        """Atomically lease the oldest queued job to `owner` and return its id."""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            conn.execute(
+                "UPDATE jobs SET status = 'running', owner = ?, heartbeat = ?, updated_at = ? WHERE id = ?",
+                (owner, now, now, row["id"]),
+            )
+            return row["id"]
+
+    def heartbeat(self, owner: str) -> int:
+        """Renew the lease on every running job held by `owner`."""
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET heartbeat = ? WHERE owner = ? AND status = 'running'",
+                (time.time(), owner),
+            )
+            return cur.rowcount
+
+    def requeue_interrupted(self, lease_timeout: float = DEFAULT_LEASE_TIMEOUT) -> int:
+        """Put running jobs whose lease went stale (their runner died) back in the queue.
+
+        Jobs still loading whose loader stopped heartbeating are marked
+        failed: their upload is incomplete and can't be resumed.
+        """
+        now = time.time()
+        cutoff = now - lease_timeout
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET status = 'queued', owner = NULL, updated_at = ? "
+                "WHERE status = 'running' AND (heartbeat IS NULL OR heartbeat < ?)",
+                (now, cutoff),
+            )
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'interrupted while loading', updated_at = ? "
+                "WHERE status = 'loading' AND (heartbeat IS NULL OR heartbeat < ?)",
+                (now, cutoff),
+            )
+            return cur.rowcount
+
+    def next_chunk(self, job_id: str, size: int) -> List[Tuple[int, Optional[str], str]]:
+        """Return the next `size` (idx, ticket_id, text) items without a result.
+
+        Chunks are saved in order, so the checkpoint is simply the job's
+        `processed` counter (committed together with each chunk's results).
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT idx, ticket_id, text FROM job_items "
+                "WHERE job_id = ? AND idx >= (SELECT processed FROM jobs WHERE id = ?) "
+                "ORDER BY idx LIMIT ?",
+                (job_id, job_id, size),
+            ).fetchall()
+        return [(r["idx"], r["ticket_id"], r["text"]) for r in rows]
+
+    def save_chunk(
+        self,
+        job_id: str,
+        results: List[Tuple[int, Dict]],
+        failed: int = 0,
+        owner: Optional[str] = None,
+    ) -> bool:
+        """Commit a chunk's results and the job's progress in one transaction.
+
+        With `owner`, nothing is written unless that runner still holds the
+        job's lease (returns False). The checkpoint only moves forward to
+        just past the chunk, so saving the same chunk twice can't skip
+        tickets.
+        """
+        if not results:
+            return True
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if owner is not None:
+                row = conn.execute("SELECT owner, status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                if row is None or row["owner"] != owner or row["status"] != "running":
+                    return False
+            already = conn.execute(
+                "SELECT COUNT(*) FROM job_results WHERE job_id = ? AND idx IN (%s)" % ",".join("?" * len(results)),
+                (job_id, *[idx for idx, _ in results]),
+            ).fetchone()[0]
+            conn.executemany(
+                "INSERT OR REPLACE INTO job_results VALUES (?, ?, ?)",
+                [(job_id, idx, json.dumps(res, ensure_ascii=False)) for idx, res in results],
+            )
+            now = time.time()
+            conn.execute(
+                "UPDATE jobs SET processed = MAX(processed, ?), failed = failed + ?, "
+                "heartbeat = ?, updated_at = ? WHERE id = ?",
+                (max(idx for idx, _ in results) + 1, failed if not already else 0, now, now, job_id),
+            )
+            return True
+
+    def set_status(
+        self,
+        job_id: str,
+        status: str,
+        error: Optional[str] = None,
+        only_if: Optional[str] = None,
+        owner: Optional[str] = None,
+    ):
+        with self._connect() as conn:
+            sql = "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?"
+            params: Tuple = (status, error, time.time(), job_id)
+            if only_if is not None:
+                sql += " AND status = ?"
+                params += (only_if,)
+            if owner is not None:
+                sql += " AND owner = ?"
+                params += (owner,)
+            conn.execute(sql, params)
+
+    def iter_results(
+        self,
+        job_id: str,
+        batch: int = 1000,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Iterator[str]:
+        """Yield stored results as JSONL lines in ticket order.
+
+        Starts at ticket index `offset` and stops after `limit` results.
+        """
+        last = offset - 1
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = batch if remaining is None else min(batch, remaining)
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT idx, result FROM job_results WHERE job_id = ? AND idx > ? ORDER BY idx LIMIT ?",
+                    (job_id, last, size),
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield row["result"] + "\n"
+            last = rows[-1]["idx"]
+            if remaining is not None:
+                remaining -= len(rows)
+
+
+class JobRunner:
+    """Background threads that process queued jobs chunk by chunk.
+
+    Args:
+        store: The JobStore to take jobs from
+        classify_batch: texts -> list of priority score maps
+        recommend_batch: Optional (texts, top_k) -> list of recommendation
+            lists; used for jobs submitted with `recommend=True`
+        workers: Number of jobs processed concurrently
+        chunk_size: Tickets per checkpointed chunk
+        lease_timeout: Seconds without a heartbeat before another runner
+            may take over a job; heartbeats are sent every quarter of it
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        classify_batch: Callable[[List[str]], List[Dict[str, float]]],
+        recommend_batch: Optional[Callable[[List[str], int], List[List[Dict]]]] = None,
+        workers: int = 1,
+        chunk_size: int = 64,
+        poll_interval: float = 1.0,
+        lease_timeout: float = DEFAULT_LEASE_TIMEOUT,
+    ):
+        self.store = store
+        self.classify_batch = classify_batch
+        self.recommend_batch = recommend_batch
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.poll_interval = poll_interval
+        self.lease_timeout = lease_timeout
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        if self._threads:
+            return
+        self._requeue_stale()
+        self._stop.clear()
+        for i in range(self.workers):
+            t = threading.Thread(target=self._loop, name=f"job-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        t = threading.Thread(target=self._lease_loop, name="job-lease", daemon=True)
+        t.start()
+        self._threads.append(t)
+
+    def _requeue_stale(self):
+        resumed = self.store.requeue_interrupted(self.lease_timeout)
+        if resumed:
+            print(f"Resuming {resumed} interrupted job(s).")
+
+    def _lease_loop(self):
+        # Keep our leases fresh and pick up jobs of runners that died
+        while not self._stop.wait(self.lease_timeout / 4):
+            try:
+                self.store.heartbeat(self.owner)
+                self._requeue_stale()
+            except Exception as e:
+                print(f"Job lease heartbeat failed: {e}")
+
+    def stop(self, timeout: float = 10.0):
+        """Stop after the current chunk; unfinished jobs resume on next start."""
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout=timeout)
+        self._threads = []
+
+    def _loop(self):
+        job_id: Optional[str] = None
+        backoff = self.poll_interval
+        while not self._stop.is_set():
+            # Database errors (e.g. "database is locked" while an upload is
+            # being stored) must not kill the worker: log, back off, retry.
+            # A job we still hold is resumed rather than claimed again.
+            try:
+                if job_id is None:
+                    job_id = self.store.claim_next(self.owner)
+                    if job_id is None:
+                        self._stop.wait(self.poll_interval)
+                        continue
+                try:
+                    self.run_job(job_id)
+                except sqlite3.Error:
+                    raise
+                except Exception as e:
+                    self.store.set_status(job_id, "failed", error=str(e), only_if="running", owner=self.owner)
+                job_id = None
+                backoff = self.poll_interval
+            except Exception as e:
+                target = f" (job {job_id})" if job_id else ""
+                print(f"Job worker error{target}: {type(e).__name__}: {e}; retrying in {backoff:.1f}s")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, MAX_ERROR_BACKOFF)
+
+    def run_job(self, job_id: str):
+        """Process a claimed job until it is done, cancelled or the runner stops."""
+        job = self.store.get_job(job_id)
+        options = job["options"] if job else {}
+        recommend = bool(options.get("recommend")) and self.recommend_batch is not None
+        top_k = int(options.get("top_k", 5))
+        while not self._stop.is_set():
+            job = self.store.get_job(job_id)
+            if job is None or job["status"] != "running" or job["owner"] != self.owner:
+                return  # cancelled, removed or taken over after our lease lapsed
+            chunk = self.store.next_chunk(job_id, self.chunk_size)
+            if not chunk:
+                self.store.set_status(job_id, "completed", only_if="running", owner=self.owner)
+                return
+            if not self.store.save_chunk(job_id, *self._process_chunk(chunk, recommend, top_k), owner=self.owner):
+                return
+        # Stopping: leave the job resumable from its last checkpoint
+        self.store.set_status(job_id, "queued", only_if="running", owner=self.owner)
+
+    def _process_chunk(self, chunk, recommend: bool, top_k: int) -> Tuple[List[Tuple[int, Dict]], int]:
+        texts = [text for _, _, text in chunk]
+        try:
+            scores = self.classify_batch(texts)
+            recs = self.recommend_batch(texts, top_k) if recommend else None
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            return [(idx, {"index": idx, "id": tid, "error": error}) for idx, tid, _ in chunk], len(chunk)
+        results = []
+        for n, (idx, tid, _) in enumerate(chunk):
+            priority, confidence = max(scores[n].items(), key=lambda x: x[1])
+            result = {
+                "index": idx,
+                "id": tid,
+                "priority": priority,
+                "confidence": confidence,
+                "priority_scores": scores[n],
+            }
+            if recs is not None:
+                result["recommendations"] = recs[n]
+            results.append((idx, result))
+        return results, 0
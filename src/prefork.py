@@ -0,0 +1,228 @@
+"""
+Preforking multi-worker server that shares model weights copy-on-write.
+
+Running `uvicorn --workers N` re-imports `src.api` in every worker, so each
+process loads its own copy of bart-large-mnli, MiniLM and the FAISS index.
+This module instead loads everything once in the parent, freezes the torch
+modules (eval mode, no grads, shared-memory storages), freezes the Python
+heap with `gc.freeze()` and then forks N uvicorn workers that all accept on
+the same listening socket.
+
+Memory per worker
+-----------------
+Estimated resident sizes for the default models. These are not
+measurements: model sizes follow from fp32 parameter counts, and the
+runtime and per-worker figures are rough guesses.
+
+  ==========================  ==========  ===========================
+  component                   size        shared across workers?
+  ==========================  ==========  ===========================
+  facebook/bart-large-mnli    ~1.6 GB     yes (loaded in parent)
+  all-MiniLM-L6-v2            ~90 MB      yes (loaded in parent)
+  FAISS IndexFlatIP           N x 1.5 KB  yes (384 float32 per vector)
+  interpreter + torch runtime ~250 MB     mostly (libraries are mapped)
+  per-worker private          ~150 MB     no (allocator arenas, request
+                                          buffers, activations)
+  ==========================  ==========  ===========================
+
+By that estimate, 4 workers need roughly 1.9 GB + 4 x 150 MB ≈ 2.5 GB
+instead of about 4 x 1.9 GB ≈ 7.6 GB when every worker loads its own
+models. The private figure grows with concurrent inference (activations
+scale with batch size x sequence length). Each worker logs its actual
+private and proportional set size at startup (see `worker_memory_mb`);
+check those on the target machine before sizing a deployment.
+
+Only Unix platforms support `os.fork`; elsewhere use a single process.
+
+Prefork mode and TICKET_INFERENCE_WORKERS (src/inference_pool.py) are
+alternatives: with an inference pool the models live in the pool's
+processes, and every forked HTTP worker would start its own pool of N
+bart-large-mnli processes. `server.py` refuses the combination, and
+`prepare_models_for_fork` leaves remote (pool-backed) models alone.
+"""
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, Iterable, List, Optional
+
+import uvicorn
+
+try:
+    import torch
+except Exception:
+    torch = None  # type: ignore
+
+
+def _torch_modules(priority_classifier, vectorizer) -> List:
+    """Collect the torch modules held by the classifier and vectorizer."""
+    if torch is None:
+        return []
+    candidates = [
+        getattr(vectorizer, "model", None),
+        getattr(getattr(priority_classifier, "_classifier", None), "model", None),
+    ]
+    return [m for m in candidates if isinstance(m, torch.nn.Module)]
+
+
+def prepare_models_for_fork(priority_classifier, vectorizer) -> int:
+    """Load all models in the current process and make them fork-friendly.
+
+    The zero-shot pipeline is normally created lazily on the first request;
+    here it is forced so the weights live in the parent. Parameters are put
+    in eval mode with `requires_grad=False` (autograd state is thread-local,
+    so disabling it per parameter also covers uvicorn's threadpool) and moved
+    to shared memory so no worker ever writes to them.
+
+    No inference is run here on purpose: warming up the intra-op thread pool
+    before forking can leave OpenMP in an unusable state in the children.
+
+    Returns the number of torch modules prepared.
+    """
+    # Pool-backed models (RemotePriorityClassifier) have nothing to load here
+    ensure_pipeline = getattr(priority_classifier, "_ensure_pipeline", None)
+    if ensure_pipeline is not None:
+        ensure_pipeline()
+    modules = _torch_modules(priority_classifier, vectorizer)
+    if torch is not None:
+        torch.set_grad_enabled(False)
+    for module in modules:
+        module.eval()
+        for param in module.parameters():
+            param.requires_grad_(False)
+        module.share_memory()
+    return len(modules)
+
+
+def worker_memory_mb() -> Dict[str, float]:
+    """Return this process's memory usage in MB from /proc/self/smaps_rollup.
+
+    `private` is what the worker costs on top of the shared pages; `pss`
+    charges each shared page proportionally to every process mapping it.
+    Returns an empty dict where /proc is not available.
+    """
+    fields = {"Rss": "rss", "Pss": "pss", "Private_Clean": "private", "Private_Dirty": "private"}
+    usage: Dict[str, float] = {}
+    try:
+        with open("/proc/self/smaps_rollup", "r", encoding="utf-8") as fh:
+            for line in fh:
+                key, _, rest = line.partition(":")
+                if key in fields:
+                    kb = float(rest.split()[0])
+                    usage[fields[key]] = usage.get(fields[key], 0.0) + kb / 1024.0
+    except OSError:
+        return {}
+    return usage
+
+
+def _bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(app, sock: socket.socket, workers: int, log_level: str):
+    """Entry point of a forked worker: serve `app` on the inherited socket."""
+    # Let uvicorn install its own graceful-shutdown handlers.
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    gc.enable()
+    if torch is not None:
+        # Split the cores between workers instead of every worker
+        # spinning up a full-size intra-op pool.
+        torch.set_num_threads(max(1, (os.cpu_count() or 1) // workers))
+    usage = worker_memory_mb()
+    if usage:
+        print(
+            f"Worker {os.getpid()} started: private={usage.get('private', 0):.0f}MB "
+            f"pss={usage.get('pss', 0):.0f}MB rss={usage.get('rss', 0):.0f}MB"
+        )
+    config = uvicorn.Config(app, log_level=log_level)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def serve_prefork(
+    app,
+    host: str = "0.0.0.0",
+    port: int = 8000,
+    workers: int = 2,
+    log_level: str = "info",
+    models: Optional[Iterable] = None,
+):
+    """Fork `workers` uvicorn processes that share the parent's loaded models.
+
+    Args:
+        app: The ASGI application (already imported, with models loaded)
+        host: Interface to bind
+        port: Port to bind
+        workers: Number of worker processes to fork
+        log_level: uvicorn log level for the workers
+        models: Optional (priority_classifier, vectorizer) pair to prepare
+            with `prepare_models_for_fork` before forking
+
+    Workers that exit unexpectedly are re-forked from the parent, which
+    still holds the pristine model pages. SIGINT/SIGTERM stop all workers.
+    """
+    if not hasattr(os, "fork"):
+        raise RuntimeError("prefork mode requires a platform with os.fork")
+
+    if models is not None:
+        count = prepare_models_for_fork(*models)
+        print(f"Prepared {count} torch module(s) for copy-on-write sharing.")
+
+    sock = _bind_socket(host, port)
+    # Move everything allocated so far into the permanent generation so the
+    # children's collector never touches (and so never copies) those pages.
+    gc.disable()
+    gc.collect()
+    gc.freeze()
+
+    children: Dict[int, int] = {}
+    stopping = False
+
+    def spawn(slot: int):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _run_worker(app, sock, workers, log_level)
+            finally:
+                os._exit(0)
+        children[pid] = slot
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    print(f"Serving on http://{host}:{port} with {workers} preforked workers (parent pid {os.getpid()})")
+    for slot in range(workers):
+        spawn(slot)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        slot = children.pop(pid, None)
+        if slot is None or stopping:
+            continue
+        print(f"Worker {pid} exited with status {status}; restarting.", file=sys.stderr)
+        # Avoid a tight crash loop if a worker dies right at startup.
+        time.sleep(1.0)
+        spawn(slot)
+
+    sock.close()
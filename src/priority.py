@@ -1,7 +1,11 @@
 """
 Priority classification for support tickets using transformers.
 """
-from typing import Dict, List, Tuple, Optional
+import threading
+from typing import Callable, Dict, List, Tuple, Optional
+
+from src.batching import DEFAULT_MAX_TOKENS, run_batched, token_budget_batches, token_lengths
+from src.chunking import chunk_text, chunk_weights
 
 try:
     from transformers import pipeline
@@ -15,17 +19,40 @@ class TicketPriorityClassifier:
     This class attempts to use a transformers zero-shot classifier lazily.
     If transformers or the model can't be loaded, it falls back to a
     simple keyword-based heuristic so the backend stays responsive.
+
+    Tickets longer than `max_input_tokens` are split into at most
+    `max_chunks` chunks whose scores are averaged, weighted by length.
+
+    With `cascade_threshold` set, a cheap scorer (the keyword heuristic by
+    default, or any `cheap_scorer(text) -> scores`) runs first and its answer
+    is used whenever its margin (top score minus runner-up) reaches the
+    threshold; only the remaining tickets go to the zero-shot model.
+    `tier_counts` records how many tickets each tier answered.
     """
 
     def __init__(
         self,
         model_name: str = "facebook/bart-large-mnli",
         labels: Optional[List[str]] = None,
+        max_input_tokens: int = 512,
+        max_chunks: int = 8,
+        cascade_threshold: Optional[float] = None,
+        cheap_scorer: Optional[Callable[[str], Dict[str, float]]] = None,
     ):
         self.model_name = model_name
         self.labels = labels or ["low", "medium", "high"]
+        self.max_input_tokens = max_input_tokens
+        self.max_chunks = max_chunks
+        self.cascade_threshold = cascade_threshold
+        self.cheap_scorer = cheap_scorer
+        self.tier_counts = {"cheap": 0, "model": 0, "fallback": 0}
+        self._counts_lock = threading.Lock()
         self._classifier = None
 
+    def _count(self, tier: str, n: int = 1):
+        with self._counts_lock:
+            self.tier_counts[tier] += n
+
     def _ensure_pipeline(self):
         if self._classifier is not None:
             return
@@ -47,13 +74,23 @@ class TicketPriorityClassifier:
     def classify(self, text: str) -> Dict[str, float]:
         """Return a mapping priority -> score (0..1).
 
-        Tries to use the zero-shot pipeline; if unavailable falls back to a
-        lightweight keyword heuristic.
+        Tries the cheap tier first when a cascade threshold is set, then the
+        zero-shot pipeline; if unavailable falls back to a lightweight
+        keyword heuristic.
         """
+        if self.cascade_threshold is not None:
+            cheap = self._confident_cheap_scores(text)
+            if cheap is not None:
+                return cheap
+
         self._ensure_pipeline()
 
         # Use model if available
         if self._classifier:
+            chunks = chunk_text(text, max_tokens=self.max_input_tokens, max_chunks=self.max_chunks)
+            if len(chunks) > 1:
+                self._count("model")
+                return self._classify_chunks(chunks)
             try:
                 res = self._classifier(text, candidate_labels=self.labels, multi_label=False)
                 scores = res.get("scores")
@@ -63,11 +100,51 @@ class TicketPriorityClassifier:
                 if scores and labels:
                     for lbl, sc in zip(labels, scores):
                         mapping[str(lbl)] = float(sc)
+                self._count("model")
                 return mapping
             except Exception as e:
                 print(f"Priority model inference failed: {e}")
 
-        # Fallback heuristic
+        self._count("fallback")
+        return self.keyword_scores(text)
+
+    def _classify_chunks(self, chunks: List[str]) -> Dict[str, float]:
+        """Length-weighted mean of the per-chunk score maps."""
+        return self._aggregate_chunks(chunks, self._model_batch(chunks, count=False))
+
+    def _aggregate_chunks(self, chunks: List[str], chunk_scores: List[Dict[str, float]]) -> Dict[str, float]:
+        mapping = {label: 0.0 for label in self.labels}
+        for weight, scores in zip(chunk_weights(chunks), chunk_scores):
+            for label, score in scores.items():
+                mapping[label] = mapping.get(label, 0.0) + weight * score
+        return mapping
+
+    def cheap_scores(self, text: str) -> Tuple[Dict[str, float], float]:
+        """Return (scores, margin) from the cheap tier.
+
+        The margin is the gap between the top two scores. The keyword
+        heuristic reports a margin of 0 when no keyword matched at all, since
+        its medium-by-default answer carries no evidence.
+        """
+        if self.cheap_scorer is not None:
+            scores = self.cheap_scorer(text)
+        else:
+            raw = self._keyword_counts(text)
+            if sum(raw.values()) == 0:
+                return self.keyword_scores(text), 0.0
+            scores = self.keyword_scores(text)
+        ranked = sorted(scores.values(), reverse=True)
+        margin = ranked[0] - ranked[1] if len(ranked) > 1 else ranked[0]
+        return scores, margin
+
+    def _confident_cheap_scores(self, text: str) -> Optional[Dict[str, float]]:
+        scores, margin = self.cheap_scores(text)
+        if margin >= self.cascade_threshold:
+            self._count("cheap")
+            return scores
+        return None
+
+    def _keyword_counts(self, text: str) -> Dict[str, float]:
         txt = (text or "").lower()
         score_map = {"low": 0.0, "medium": 0.0, "high": 0.0}
 
@@ -85,9 +162,14 @@ class TicketPriorityClassifier:
         for kw in low_keywords:
             if kw in txt:
                 score_map["low"] += 1.0
+        return score_map
+
+    def keyword_scores(self, text: str) -> Dict[str, float]:
+        """Lightweight keyword heuristic used when the model is unavailable."""
+        score_map = self._keyword_counts(text)
 
         # Base score for length / severity
-        length = len(txt.split())
+        length = len((text or "").split())
         if length > 100:
             score_map["medium"] += 0.5
         if length > 300:
@@ -100,6 +182,98 @@ class TicketPriorityClassifier:
             return {"low": 0.1, "medium": 0.8, "high": 0.1}
         return {k: v / total for k, v in score_map.items()}
 
+    def classify_batch(
+        self,
+        texts: List[str],
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+    ) -> List[Dict[str, float]]:
+        """Classify many tickets at once, in input order.
+
+        With a cascade threshold, tickets the cheap tier is sure about are
+        answered directly and only the rest are sent to the model. Long
+        tickets are chunked exactly as in `classify`; all chunks and short
+        tickets share the same token-budget batches.
+        """
+        texts = list(texts)
+        results: List[Optional[Dict[str, float]]] = [None] * len(texts)
+        if self.cascade_threshold is not None:
+            for i, text in enumerate(texts):
+                results[i] = self._confident_cheap_scores(text)
+        pending = [i for i, r in enumerate(results) if r is None]
+        if not pending:
+            return results
+        self._ensure_pipeline()
+        if not self._classifier:
+            for i, sc in zip(pending, self._model_batch([texts[i] for i in pending], max_tokens=max_tokens)):
+                results[i] = sc
+            return results
+
+        chunked = [chunk_text(texts[i], max_tokens=self.max_input_tokens, max_chunks=self.max_chunks) for i in pending]
+        flat = [chunk for chunks in chunked for chunk in chunks]
+        flat_scores = self._model_batch(flat, max_tokens=max_tokens, count=False)
+        self._count("model", len(pending))
+        offset = 0
+        for i, chunks in zip(pending, chunked):
+            scores = flat_scores[offset:offset + len(chunks)]
+            offset += len(chunks)
+            results[i] = scores[0] if len(chunks) == 1 else self._aggregate_chunks(chunks, scores)
+        return results
+
+    def _model_batch(
+        self,
+        texts: List[str],
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        count: bool = True,
+    ) -> List[Dict[str, float]]:
+        """Run the zero-shot model over texts in token-budget batches.
+
+        Tickets are grouped into length-sorted batches under a padded-token
+        budget (each ticket is paired with every label, so the budget is
+        shared by `len(labels)` sequences per ticket).
+        """
+        if not texts:
+            return []
+        self._ensure_pipeline()
+        if not self._classifier:
+            if count:
+                self._count("fallback", len(texts))
+            return [self.keyword_scores(t) for t in texts]
+
+        tokenizer = getattr(self._classifier, "tokenizer", None)
+        max_length = getattr(tokenizer, "model_max_length", None)
+        if max_length is not None and max_length > 100000:
+            # Tokenizers without a configured limit report a huge sentinel
+            max_length = None
+        lengths = token_lengths(texts, tokenizer=tokenizer, max_length=max_length)
+        batches = token_budget_batches(lengths, max_tokens=max(1, max_tokens // len(self.labels)))
+
+        def run(batch_texts: List[str]) -> List[Dict[str, float]]:
+            try:
+                outputs = self._classifier(
+                    batch_texts,
+                    candidate_labels=self.labels,
+                    multi_label=False,
+                    batch_size=len(batch_texts) * len(self.labels),
+                )
+            except Exception as e:
+                print(f"Priority model batch inference failed: {e}")
+                if count:
+                    self._count("fallback", len(batch_texts))
+                return [self.keyword_scores(t) for t in batch_texts]
+            if isinstance(outputs, dict):
+                outputs = [outputs]
+            results = []
+            for res in outputs:
+                mapping = {label: 0.0 for label in self.labels}
+                for lbl, sc in zip(res.get("labels") or [], res.get("scores") or []):
+                    mapping[str(lbl)] = float(sc)
+                results.append(mapping)
+            if count:
+                self._count("model", len(batch_texts))
+            return results
+
+        return run_batched(texts, batches, run)
+
     def get_priority(self, text: str) -> Tuple[str, float]:
         probs = self.classify(text)
         priority = max(probs.items(), key=lambda x: x[1])
@@ -0,0 +1,114 @@
+"""
+PCA / whitening projection stage for article vectors.
+
+MiniLM produces 384-d float32 vectors. A PCA projection fitted on the
+corpus can reduce them to e.g. 128 or 64 dimensions, which shrinks a flat
+index proportionally and speeds up search at a small recall cost. The
+projection is a `faiss.PCAMatrix` saved next to the index; the same
+transform is applied to corpus vectors at build time and to every query.
+Projected vectors are re-normalized so inner product is still cosine.
+"""
+import time
+from typing import Dict, Optional
+
+import numpy as np
+try:
+    import faiss
+except Exception:
+    faiss = None  # type: ignore
+
+
+def fit_projection(embeddings: np.ndarray, dim: int, whiten: bool = False):
+    """Fit a PCA (optionally whitening) projection from the corpus vectors."""
+    if faiss is None:
+        raise RuntimeError("faiss is not installed or failed to import")
+    embeddings = np.ascontiguousarray(embeddings, dtype="float32")
+    if dim >= embeddings.shape[1]:
+        raise ValueError(f"projection dim {dim} must be smaller than the vector dim {embeddings.shape[1]}")
+    # eigen_power=-0.5 scales each component by 1/sqrt(eigenvalue) (whitening)
+    pca = faiss.PCAMatrix(embeddings.shape[1], dim, -0.5 if whiten else 0.0)
+    pca.train(embeddings)
+    return pca
+
+
+def apply_projection(projection, vectors: np.ndarray) -> np.ndarray:
+    """Project vectors (if a projection is given) and L2-normalize them."""
+    vectors = np.ascontiguousarray(vectors, dtype="float32")
+    if projection is None:
+        return vectors
+    out = np.ascontiguousarray(projection.apply_py(vectors), dtype="float32")
+    faiss.normalize_L2(out)
+    return out
+
+
+def save_projection(projection, path: str):
+    faiss.write_VectorTransform(projection, path)
+
+
+def load_projection(path: str):
+    if faiss is None:
+        raise RuntimeError("faiss not available")
+    return faiss.read_VectorTransform(path)
+
+
+def compare_projection(
+    embeddings: np.ndarray,
+    dim: int,
+    whiten: bool = False,
+    k: int = 10,
+    n_queries: int = 200,
+    seed: int = 0,
+) -> Dict[str, float]:
+    """Measure what a `dim`-d projection costs and saves against full-dimension search.
+
+    Holds out a random sample of corpus vectors as queries, fits the
+    projection (as `fit_projection` would) on the remaining vectors only,
+    builds flat indexes over the remaining full and projected vectors, and
+    reports recall@k of the projected search relative to the full one, index
+    memory and mean search latency per query (projection time included).
+    The queries are unseen by both the indexes and the PCA, so the recall
+    is an out-of-sample figure.
+    """
+    if faiss is None:
+        raise RuntimeError("faiss is not installed or failed to import")
+    embeddings = np.ascontiguousarray(embeddings, dtype="float32")
+    if len(embeddings) < 2:
+        raise ValueError("need at least two vectors to hold out queries")
+    rng = np.random.default_rng(seed)
+    held_out = np.zeros(len(embeddings), dtype=bool)
+    held_out[rng.choice(len(embeddings), size=min(n_queries, len(embeddings) // 2), replace=False)] = True
+    queries = embeddings[held_out]
+    embeddings = np.ascontiguousarray(embeddings[~held_out])
+    k = min(k, len(embeddings))
+    projection = fit_projection(embeddings, dim, whiten=whiten)
+
+    full = faiss.IndexFlatIP(embeddings.shape[1])
+    full.add(embeddings)
+    reduced_vectors = apply_projection(projection, embeddings)
+    reduced = faiss.IndexFlatIP(reduced_vectors.shape[1])
+    reduced.add(reduced_vectors)
+
+    def timed(fn) -> float:
+        start = time.perf_counter()
+        for i in range(len(queries)):
+            fn(queries[i:i + 1])
+        return (time.perf_counter() - start) / len(queries)
+
+    full_latency = timed(lambda q: full.search(q, k))
+    reduced_latency = timed(lambda q: reduced.search(apply_projection(projection, q), k))
+
+    _, I_full = full.search(queries, k)
+    _, I_reduced = reduced.search(apply_projection(projection, queries), k)
+    overlap = [len(set(a) & set(b)) / k for a, b in zip(I_full.tolist(), I_reduced.tolist())]
+
+    return {
+        "k": k,
+        "queries": len(queries),
+        "full_dim": embeddings.shape[1],
+        "reduced_dim": reduced_vectors.shape[1],
+        "recall_at_k": float(np.mean(overlap)),
+        "full_bytes": float(embeddings.nbytes),
+        "reduced_bytes": float(reduced_vectors.nbytes),
+        "full_latency_ms": full_latency * 1000,
+        "reduced_latency_ms": reduced_latency * 1000,
+    }
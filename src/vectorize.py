@@ -3,11 +3,57 @@ Ticket text vectorization using sentence-transformers.
 """
 import json
 from pathlib import Path
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
 
 import numpy as np
 from sentence_transformers import SentenceTransformer
 
+from src.batching import DEFAULT_MAX_TOKENS, token_budget_batches, token_lengths
+from src.chunking import chunk_text, chunk_weights
+
+
+# Characters of ticket text kept as the title / snippet in ticket metadata
+TITLE_CHARS = 80
+SNIPPET_CHARS = 200
+
+
+def read_tickets(jsonl_path: Union[str, Path]) -> List[Tuple[str, Dict]]:
+    """Return (id, ticket) for every ticket with text in a JSONL file.
+
+    Tickets without an `id` are keyed by their line number so they don't
+    collapse onto one key.
+    """
+    tickets = []
+    with open(jsonl_path) as f:
+        for row, line in enumerate(f):
+            if not line.strip():
+                continue
+            ticket = json.loads(line)
+            if "text" in ticket and ticket["text"]:
+                ticket_id = ticket.get("id")
+                tickets.append((str(ticket_id) if ticket_id not in (None, "") else str(row), ticket))
+    return tickets
+
+
+def ticket_metadata(jsonl_path: Union[str, Path]) -> Dict[str, Dict]:
+    """Search metadata ({id: {orig_id, title, snippet}}) for the tickets in a JSONL file."""
+    meta = {}
+    for ticket_id, ticket in read_tickets(jsonl_path):
+        text = " ".join(str(ticket["text"]).split())
+        meta[ticket_id] = {
+            "orig_id": ticket_id,
+            "title": ticket.get("title") or text[:TITLE_CHARS],
+            "snippet": text[:SNIPPET_CHARS],
+        }
+    return meta
+
+
+def _mean_of_chunks(embeddings: np.ndarray, chunks: List[str]) -> np.ndarray:
+    """Length-weighted, re-normalized mean of one document's chunk vectors."""
+    mean = np.average(embeddings, axis=0, weights=chunk_weights(chunks))
+    norm = np.linalg.norm(mean)
+    return (mean / norm if norm > 0 else mean).astype(embeddings.dtype)
+
 
 class TicketVectorizer:
     """Convert support ticket text into dense vector embeddings."""
@@ -32,6 +78,7 @@ class TicketVectorizer:
         batch_size: int = 32,
         show_progress_bar: bool = False,
         normalize_embeddings: bool = True,
+        max_tokens: Optional[int] = None,
     ) -> np.ndarray:
         """Convert text or list of texts into embeddings.
         
@@ -40,10 +87,16 @@ class TicketVectorizer:
             batch_size: Batch size for encoding
             show_progress_bar: Whether to show progress during encoding
             normalize_embeddings: Whether to L2-normalize the embeddings
+            max_tokens: If set, ignore `batch_size` and form length-sorted
+                batches of at most this many padded tokens (see src/batching.py)
             
         Returns:
             Array of shape (N, D) containing the embeddings
         """
+        if max_tokens and not isinstance(texts, str) and len(texts) > 1:
+            return self._encode_token_budget(
+                list(texts), max_tokens, show_progress_bar, normalize_embeddings
+            )
         return self.model.encode(
             texts,
             batch_size=batch_size,
@@ -51,10 +104,82 @@ class TicketVectorizer:
             normalize_embeddings=normalize_embeddings,
         )
 
+    def encode_document(self, text: str, max_chunks: int = 8) -> np.ndarray:
+        """Embed a possibly very long text as the mean of its chunk embeddings.
+
+        The model only sees its first `max_seq_length` tokens of any input,
+        so long tickets are split with `chunk_text` and the chunk vectors
+        averaged (weighted by length) and re-normalized. Short texts are
+        encoded exactly as `encode` would.
+
+        Returns:
+            Array of shape (D,)
+        """
+        max_tokens = getattr(self.model, "max_seq_length", None) or 256
+        chunks = chunk_text(text, max_tokens=max_tokens, max_chunks=max_chunks)
+        if len(chunks) == 1:
+            return self.encode(chunks[0])
+        return _mean_of_chunks(self.encode(chunks), chunks)
+
+    def encode_documents(
+        self,
+        texts: List[str],
+        max_chunks: int = 8,
+        max_tokens: Optional[int] = DEFAULT_MAX_TOKENS,
+    ) -> np.ndarray:
+        """`encode_document` for many texts, with all their chunks encoded together.
+
+        Returns:
+            Array of shape (N, D)
+        """
+        limit = getattr(self.model, "max_seq_length", None) or 256
+        chunked = [chunk_text(text, max_tokens=limit, max_chunks=max_chunks) for text in texts]
+        flat = [chunk for chunks in chunked for chunk in chunks]
+        embeddings = np.asarray(self.encode(flat, max_tokens=max_tokens))
+        out = []
+        start = 0
+        for chunks in chunked:
+            part = embeddings[start:start + len(chunks)]
+            start += len(chunks)
+            out.append(part[0] if len(chunks) == 1 else _mean_of_chunks(part, chunks))
+        return np.stack(out)
+
+    def _encode_token_budget(
+        self,
+        texts: List[str],
+        max_tokens: int,
+        show_progress_bar: bool,
+        normalize_embeddings: bool,
+    ) -> np.ndarray:
+        """Encode texts in token-budget batches and restore input order."""
+        lengths = token_lengths(
+            texts,
+            tokenizer=getattr(self.model, "tokenizer", None),
+            max_length=getattr(self.model, "max_seq_length", None),
+        )
+        batches = token_budget_batches(lengths, max_tokens=max_tokens)
+        if show_progress_bar:
+            from tqdm import tqdm
+
+            batches = tqdm(batches, desc="Batches")
+        embeddings = None
+        for batch in batches:
+            emb = self.model.encode(
+                [texts[i] for i in batch],
+                batch_size=len(batch),
+                show_progress_bar=False,
+                normalize_embeddings=normalize_embeddings,
+            )
+            if embeddings is None:
+                embeddings = np.empty((len(texts), emb.shape[1]), dtype=emb.dtype)
+            embeddings[batch] = emb
+        return embeddings
+
     def encode_tickets(
         self,
         jsonl_path: Union[str, Path],
         batch_size: int = 32,
+        max_tokens: Optional[int] = None,
     ) -> Dict[str, np.ndarray]:
         """Read tickets from a JSONL file and convert to embeddings.
         
@@ -62,24 +187,20 @@ class TicketVectorizer:
             jsonl_path: Path to JSONL file containing tickets
                 (expects 'id' and 'text' fields)
             batch_size: Batch size for encoding
+            max_tokens: Optional padded-token budget per batch (overrides
+                `batch_size`, see `encode`)
             
         Returns:
             Dict mapping ticket IDs to their embeddings
         """
-        texts = []
-        ids = []
-        
-        with open(jsonl_path) as f:
-            for line in f:
-                ticket = json.loads(line)
-                if "text" in ticket and ticket["text"]:
-                    texts.append(ticket["text"])
-                    ids.append(ticket.get("id", ""))
-                    
+        tickets = read_tickets(jsonl_path)
+        ids = [ticket_id for ticket_id, _ in tickets]
+        texts = [ticket["text"] for _, ticket in tickets]
         embeddings = self.encode(
             texts,
             batch_size=batch_size,
             show_progress_bar=True,
+            max_tokens=max_tokens,
         )
         return dict(zip(ids, embeddings))
 
@@ -102,6 +223,12 @@ def main():
         required=True,
         help="Output .npy file to save embeddings",
     )
+    parser.add_argument(
+        "--meta-output",
+        type=Path,
+        default=None,
+        help="Output JSON of ticket titles/snippets for search (default: <output>_meta.json)",
+    )
     parser.add_argument(
         "--model",
         default="all-MiniLM-L6-v2",
@@ -113,17 +240,28 @@ def main():
         default=32,
         help="Batch size for encoding",
     )
+    parser.add_argument(
+        "--max-tokens",
+        type=int,
+        default=DEFAULT_MAX_TOKENS,
+        help="Padded-token budget per length-sorted batch (0 = fixed --batch-size batches)",
+    )
     args = parser.parse_args()
     
     vectorizer = TicketVectorizer(model_name=args.model)
     embeddings = vectorizer.encode_tickets(
         args.input,
         batch_size=args.batch_size,
+        max_tokens=args.max_tokens or None,
     )
     
     # Save as .npy file
     np.save(args.output, embeddings)
     print(f"Saved {len(embeddings)} embeddings to {args.output}")
+    meta_output = args.meta_output or args.output.with_name(args.output.stem + "_meta.json")
+    with open(meta_output, "w", encoding="utf-8") as f:
+        json.dump(ticket_metadata(args.input), f, ensure_ascii=False)
+    print(f"Saved ticket metadata to {meta_output}")
 
 
 if __name__ == "__main__":
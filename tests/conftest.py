@@ -0,0 +1,67 @@
+"""Fixtures shared by the FAISS index, snapshot and collection tests."""
+import numpy as np
+import pytest
+
+
+class FixedEmbedder:
+    """Embedder stub that encodes every text as the same vector."""
+
+    def __init__(self, vector):
+        self.vector = np.asarray(vector, dtype="float32")
+
+    def encode(self, texts, **kwargs):
+        if isinstance(texts, str):
+            return self.vector
+        return np.stack([self.vector] * len(texts))
+
+
+@pytest.fixture
+def fixed_embedder():
+    """Factory: `fixed_embedder(vector)`, or `fixed_embedder(dim)` for a constant unit vector."""
+
+    def make(vector):
+        if np.isscalar(vector):
+            vector = np.ones(int(vector), dtype="float32") / np.sqrt(vector)
+        return FixedEmbedder(vector)
+
+    return make
+
+
+@pytest.fixture
+def make_manager():
+    """Factory: a FaissIndexManager with a flat inner-product index over `vectors`.
+
+    `metas` is a list (row i -> metas[i]) or a {row: meta} dict.
+    """
+    faiss = pytest.importorskip("faiss")
+    from src.faiss_index import FaissIndexManager
+
+    def make(vectors, metas, **kwargs):
+        vectors = np.ascontiguousarray(vectors, dtype="float32")
+        manager = FaissIndexManager(**kwargs)
+        manager.index = faiss.IndexFlatIP(vectors.shape[1])
+        manager.index.add(vectors)
+        manager.id_to_meta = dict(metas) if isinstance(metas, dict) else dict(enumerate(metas))
+        manager._index_changed()
+        return manager
+
+    return make
+
+
+@pytest.fixture
+def write_snapshot(make_manager):
+    """Factory: save an `n`-vector snapshot titled `title`-<row> into a SnapshotStore.
+
+    `meta_count` writes metadata for fewer rows than vectors (a broken
+    snapshot). Returns the new version name.
+    """
+    from src.index_snapshots import save_snapshot
+
+    def write(store, title, n=4, meta_count=None):
+        count = meta_count if meta_count is not None else n
+        manager = make_manager(np.eye(n), [{"title": f"{title}-{i}"} for i in range(count)])
+        path = store.new_version_dir()
+        save_snapshot(manager, path)
+        return path.name
+
+    return write
@@ -0,0 +1,142 @@
+"""Tests for priority-aware admission control."""
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src import api
+from src.admission import AdmissionController, Overloaded
+
+
+def test_waiters_are_admitted_by_class_then_arrival():
+    admission = AdmissionController(slots=1)
+    order = []
+
+    async def request(klass, name):
+        async with admission.admit(klass):
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    async def main():
+        async with admission.admit("interactive"):
+            tasks = [
+                asyncio.ensure_future(request("bulk", "bulk")),
+                asyncio.ensure_future(request("interactive", "i1")),
+                asyncio.ensure_future(request("urgent", "u1")),
+                asyncio.ensure_future(request("interactive", "i2")),
+            ]
+            await asyncio.sleep(0.01)
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    assert order == ["u1", "i1", "i2", "bulk"]
+    assert admission.stats()["in_use"] == 0
+
+
+def test_full_queue_is_shed_and_deadline_expires():
+    admission = AdmissionController(slots=1, max_queue={"batch": 1}, deadlines={"interactive": 0.02})
+    outcomes = []
+
+    async def request(klass):
+        try:
+            async with admission.admit(klass):
+                outcomes.append((klass, "ran"))
+        except Overloaded as e:
+            outcomes.append((klass, e.reason.split(":")[0].split(" ")[0]))
+
+    async def main():
+        async with admission.admit("bulk"):
+            queued = asyncio.ensure_future(request("batch"))
+            await asyncio.sleep(0)
+            await request("batch")        # queue already holds one batch request
+            await request("interactive")  # waits 20 ms, then gives up
+        await queued
+
+    asyncio.run(main())
+    assert ("batch", "shed") in outcomes
+    assert ("interactive", "missed") in outcomes
+    assert ("batch", "ran") in outcomes
+    stats = admission.stats()["classes"]
+    assert stats["batch"]["shed"] == 1 and stats["interactive"]["timed_out"] == 1
+    assert stats["interactive"]["waiting"] == 0
+
+
+def test_blocking_hold_for_worker_threads():
+    admission = AdmissionController(slots=1)
+    ran = []
+    with admission.hold("interactive"):
+        worker = threading.Thread(target=lambda: _hold_and_record(admission, ran))
+        worker.start()
+        time.sleep(0.02)
+        assert ran == [] and admission.stats()["classes"]["bulk"]["waiting"] == 1
+    worker.join(1)
+    assert ran == ["bulk"]
+
+
+def _hold_and_record(admission, ran):
+    with admission.hold("bulk"):
+        ran.append("bulk")
+
+
+class SlowClassifier:
+    def classify(self, text):
+        time.sleep(0.2)
+        return {"low": 0.1, "medium": 0.2, "high": 0.7}
+
+
+def test_analyze_degrades_to_keywords_when_overloaded(monkeypatch):
+    monkeypatch.setattr(api, "priority_classifier", SlowClassifier())
+    monkeypatch.setattr(api, "admission", AdmissionController(slots=1, max_queue={"interactive": 0, "urgent": 0}))
+    client = TestClient(api.app)
+    results = []
+
+    def post():
+        results.append(client.post("/analyze", data={"ticket": "How do I export a report?"}).json())
+
+    threads = [threading.Thread(target=post) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sum(r["degraded"] for r in results) == 2
+    assert [r["priority"] for r in results if r["degraded"]] == ["low", "low"]
+    assert [r["priority"] for r in results if not r["degraded"]] == ["high"]
+
+
+def test_run_keeps_the_slot_until_a_cancelled_inference_finishes():
+    admission = AdmissionController(slots=1)
+    finish = threading.Event()
+
+    async def main():
+        task = asyncio.ensure_future(admission.run("interactive", finish.wait, 5))
+        await asyncio.sleep(0.05)
+        task.cancel()  # e.g. the client disconnected mid-inference
+        await asyncio.sleep(0.05)
+        assert admission.stats()["in_use"] == 1
+        finish.set()
+        await asyncio.sleep(0.05)
+        assert admission.stats()["in_use"] == 0
+
+    asyncio.run(main())
+
+
+class SlowBatchClassifier(SlowClassifier):
+    def classify_batch(self, texts):
+        time.sleep(0.05 * len(texts))
+        return [{"low": 0.6, "medium": 0.3, "high": 0.1} for _ in texts]
+
+
+def test_interactive_request_is_not_stuck_behind_a_bulk_job(monkeypatch):
+    monkeypatch.setattr(api, "priority_classifier", SlowBatchClassifier())
+    monkeypatch.setattr(api, "admission", AdmissionController(slots=1, deadlines={"interactive": 1.0}))
+    # One 64-ticket job chunk takes ~3.2 s, far past the interactive deadline
+    bulk = threading.Thread(target=api.admitted_classify_batch, args=([f"ticket {i}" for i in range(64)],))
+    bulk.start()
+    try:
+        time.sleep(0.1)
+        result = TestClient(api.app).post("/analyze", data={"ticket": "How do I export a report?"}).json()
+    finally:
+        bulk.join()
+    assert not result["degraded"] and result["priority"] == "high"
@@ -0,0 +1,54 @@
+import json
+
+from fastapi.testclient import TestClient
+from src import api
+
+client = TestClient(api.app)
+
+
+class MockClassifier:
+    def classify(self, text):
+        return {"low": 0.1, "medium": 0.2, "high": 0.7}
+
+    def classify_batch(self, texts):
+        return [self.classify(t) for t in texts]
+
+
+def test_analyze_batch_streams_ndjson(monkeypatch):
+    monkeypatch.setattr(api, "priority_classifier", MockClassifier())
+    doc = "Site down\n---\nFeature request\n---\nHow do I reset my password?"
+
+    resp = client.post("/analyze/batch", data={"tickets": doc, "batch_size": "2"})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+
+    assert lines[0] == {"type": "start", "total": 3}
+    results = [l for l in lines if l["type"] == "result"]
+    assert [r["index"] for r in results] == [0, 1, 2]
+    assert results[0]["priority"] == "high"
+    assert lines[-1]["type"] == "done" and lines[-1]["completed"] == 3
+
+
+def test_analyze_rejects_oversized_upload(monkeypatch):
+    monkeypatch.setattr(api, "priority_classifier", MockClassifier())
+    big = b"a" * (api.MAX_UPLOAD_BYTES + 1)
+    resp = client.post("/analyze", data={"ticket": "x"}, files={"ticket_file": ("t.txt", big)})
+    assert resp.status_code == 413
+
+
+def test_analyze_echo_text_modes(monkeypatch):
+    monkeypatch.setattr(api, "priority_classifier", MockClassifier())
+    text = "y" * (api.ECHO_PREVIEW_CHARS + 10)
+
+    full = client.post("/analyze", data={"ticket": text}).json()
+    assert full["ticket_text"] == text and not full["ticket_text_truncated"]
+
+    short = client.post("/analyze", data={"ticket": text, "echo_text": "truncated"}).json()
+    assert len(short["ticket_text"]) == api.ECHO_PREVIEW_CHARS and short["ticket_text_truncated"]
+    assert short["ticket_length"] == len(text)
+
+    none = client.post("/analyze", data={"ticket": text, "echo_text": "none"}).json()
+    assert none["ticket_text"] is None
+
+    assert client.post("/analyze", data={"ticket": text, "echo_text": "bogus"}).status_code == 422
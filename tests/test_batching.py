@@ -0,0 +1,36 @@
+"""Tests for length-aware batching helpers."""
+from src.batching import (
+    fixed_size_batches,
+    padding_efficiency,
+    run_batched,
+    token_budget_batches,
+)
+
+
+def test_token_budget_batches_respect_budget_and_cover_all():
+    lengths = [5, 300, 8, 12, 250, 7, 6, 40]
+    batches = token_budget_batches(lengths, max_tokens=600)
+
+    flat = sorted(i for b in batches for i in b)
+    assert flat == list(range(len(lengths)))
+    for b in batches:
+        assert len(b) * max(lengths[i] for i in b) <= 600
+
+
+def test_oversized_input_gets_its_own_batch():
+    batches = token_budget_batches([1000, 3, 3], max_tokens=100)
+    assert [0] in batches
+
+
+def test_bucketing_reduces_padding():
+    lengths = [4, 300] * 16
+    baseline = padding_efficiency(lengths, fixed_size_batches(len(lengths), 8))
+    bucketed = padding_efficiency(lengths, token_budget_batches(lengths, max_tokens=2400))
+    assert bucketed > 0.95
+    assert bucketed > baseline
+
+
+def test_run_batched_restores_input_order():
+    items = ["ccc", "a", "bb"]
+    batches = token_budget_batches([len(x) for x in items], max_tokens=4)
+    assert run_batched(items, batches, lambda xs: [x.upper() for x in xs]) == ["CCC", "A", "BB"]
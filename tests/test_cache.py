@@ -0,0 +1,77 @@
+"""Tests for the recommendation result cache."""
+import time
+
+import numpy as np
+import pytest
+
+from src.cache import TTLCache
+
+faiss = pytest.importorskip("faiss")
+
+
+def test_lru_eviction_and_ttl_expiry():
+    cache = TTLCache(maxsize=2, ttl=0.05)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)  # evicts "b", the least recently used
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    assert cache.stats()["evictions"] == 1
+
+
+class CountingEmbedder:
+    def __init__(self, vectors):
+        self.vectors = vectors
+        self.calls = 0
+
+    def encode(self, texts, **kwargs):
+        self.calls += 1
+        if isinstance(texts, str):
+            return self.vectors[0]
+        return np.stack([self.vectors[0]] * len(texts))
+
+
+@pytest.fixture
+def manager_and_embedder(make_manager):
+    vectors = np.eye(4, dtype="float32")
+    manager = make_manager(vectors, [{"title": f"A{i}", "raw": {"product": "mail" if i % 2 else "crm"}} for i in range(4)])
+    return manager, CountingEmbedder(vectors)
+
+
+def test_search_is_cached_per_normalized_query_and_invalidated_on_update(manager_and_embedder):
+    manager, embedder = manager_and_embedder
+    first = manager.search("Login  broken", top_k=2, embedder=embedder)
+    again = manager.search(" Login broken ", top_k=2, embedder=embedder)
+    assert again == first and embedder.calls == 1
+
+    manager.search("Login broken", top_k=2, embedder=embedder, filters={"product": "mail"})
+    assert embedder.calls == 2
+
+    manager.add_texts(["new article"], [{"title": "A4"}], embedder=embedder)
+    manager.search("Login broken", top_k=2, embedder=embedder)
+    assert embedder.calls == 4  # add_texts encode + re-search after invalidation
+
+
+def test_filters_restrict_results(manager_and_embedder):
+    manager, embedder = manager_and_embedder
+    hits = manager.search("q", top_k=4, embedder=embedder, filters={"product": "mail"})
+    assert sorted(m["title"] for m, _ in hits) == ["A1", "A3"]
+
+
+def test_list_valued_filters_are_cacheable(manager_and_embedder):
+    manager, embedder = manager_and_embedder
+    manager.id_to_meta[2]["raw"]["tags"] = ["a"]
+    hits = manager.search("q", top_k=4, embedder=embedder, filters={"tags": ["a"]})
+    assert [m["title"] for m, _ in hits] == ["A2"]
+    manager.search("q", top_k=4, embedder=embedder, filters={"tags": ["a"]})
+    assert embedder.calls == 1
+
+
+def test_add_texts_leaves_the_index_being_searched_untouched(manager_and_embedder):
+    manager, embedder = manager_and_embedder
+    live, _, _ = manager._snapshot()
+    manager.add_texts(["new article"], [{"title": "A4"}], embedder=embedder)
+    assert live.ntotal == 4 and manager.index.ntotal == 5
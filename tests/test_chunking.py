@@ -0,0 +1,39 @@
+"""Tests for long-ticket chunking."""
+from src.chunking import chunk_text, chunk_weights, split_tickets
+
+
+def test_short_text_is_single_chunk():
+    assert chunk_text("Cannot login after reset", max_tokens=64) == ["Cannot login after reset"]
+
+
+def test_long_text_is_bounded_and_covers_start_and_end():
+    words = [f"w{i}" for i in range(10000)]
+    chunks = chunk_text(" ".join(words), max_tokens=130, max_chunks=4)
+
+    assert len(chunks) == 4
+    assert all(len(c.split()) <= 100 for c in chunks)
+    assert chunks[0].split()[0] == "w0"
+    assert chunks[-1].split()[-1] == "w9999"
+
+
+def test_chunk_weights_sum_to_one():
+    weights = chunk_weights(["a b c", "d"])
+    assert abs(sum(weights) - 1.0) < 1e-9
+    assert weights[0] == 0.75
+
+
+def test_split_tickets_matches_ui_rules():
+    doc = "Login broken\nCannot sign in\n\n---\n\nDB down\nurgent\n---\n-----\n---\n123\n"
+    assert split_tickets(doc) == ["Login broken\nCannot sign in", "DB down\nurgent"]
+
+
+def test_split_tickets_falls_back_to_paragraphs():
+    doc = "First ticket text\n\nSecond ticket text\n\n  \n"
+    assert split_tickets(doc) == ["First ticket text", "Second ticket text"]
+
+
+def test_text_without_whitespace_is_capped_in_characters():
+    blob = "x" * 2_000_000
+    chunks = chunk_text(blob, max_tokens=256, max_chunks=8)
+    assert 1 < len(chunks) <= 8
+    assert all(len(c) <= 256 * 8 for c in chunks)
@@ -0,0 +1,83 @@
+"""Tests for sharded FAISS scatter-gather search."""
+import json
+import threading
+import time
+
+import numpy as np
+import pytest
+
+faiss = pytest.importorskip("faiss")
+
+from src.faiss_shards import build_sharded, load_manifest, partition, save_manifest, serve_shard
+
+
+def random_unit_vectors(n, dim=32, seed=0):
+    rng = np.random.default_rng(seed)
+    x = rng.standard_normal((n, dim)).astype("float32")
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def test_sharded_search_matches_single_index():
+    vectors = random_unit_vectors(500)
+    queries = random_unit_vectors(7, seed=1)
+    flat = faiss.IndexFlatIP(vectors.shape[1])
+    flat.add(vectors)
+
+    metas = [{"orig_id": f"a{i}"} for i in range(len(vectors))]
+    sharded = build_sharded(vectors, partition(metas, 4), 4)
+    assert sharded.ntotal == 500
+
+    D_ref, I_ref = flat.search(queries, 10)
+    D, I = sharded.search(queries, 10)
+    np.testing.assert_array_equal(I, I_ref)
+    np.testing.assert_allclose(D, D_ref, rtol=1e-5)
+
+
+def test_attribute_partition_keeps_groups_together():
+    metas = [{"raw": {"product": p}} for p in ["mail", "crm", "mail", "billing", "crm"]]
+    shards = partition(metas, 3, attribute="product")
+    assert shards[0] == shards[2] and shards[1] == shards[4]
+
+
+def test_remote_shard_over_ipc(tmp_path):
+    vectors = random_unit_vectors(200)
+    sharded = build_sharded(vectors, [i % 2 for i in range(200)], 2)
+    manifest_path = tmp_path / "manifest.json"
+    save_manifest(sharded, str(manifest_path), "faiss_meta.json")
+
+    address = str(tmp_path / "shard-1.sock")
+    threading.Thread(target=serve_shard, args=(str(manifest_path), "shard-1", address), daemon=True).start()
+    manifest = json.loads(manifest_path.read_text())
+    manifest["shards"][1]["address"] = address
+    manifest_path.write_text(json.dumps(manifest))
+    for _ in range(100):
+        if (tmp_path / "shard-1.sock").exists():
+            break
+        time.sleep(0.05)
+
+    mixed = load_manifest(str(manifest_path))
+    D, I = mixed.search(vectors[:3], 5)
+    assert I[:, 0].tolist() == [0, 1, 2]
+
+
+def test_empty_shards_are_skipped():
+    vectors = random_unit_vectors(40)
+    # Two products over four shards: at least two shards stay empty
+    metas = [{"raw": {"product": "mail" if i % 2 else "crm"}} for i in range(40)]
+    sharded = build_sharded(vectors, partition(metas, 4, attribute="product"), 4)
+    assert any(s.ntotal == 0 for s in sharded.shards)
+
+    D, I = sharded.search(vectors[:3], 5)
+    assert I.shape == (3, 5) and (I >= 0).all()
+    assert list(I[:, 0]) == [0, 1, 2]
+
+
+def test_tcp_shards_require_an_authkey(monkeypatch):
+    from src.faiss_shards import _authkey, _parse_address
+
+    monkeypatch.delenv("TICKET_SHARD_AUTHKEY", raising=False)
+    with pytest.raises(RuntimeError, match="TICKET_SHARD_AUTHKEY"):
+        _authkey(_parse_address("127.0.0.1:9001"))
+    assert _authkey(_parse_address("/tmp/shard-1.sock"))
+    monkeypatch.setenv("TICKET_SHARD_AUTHKEY", "s3cret")
+    assert _authkey(_parse_address("10.0.0.5:9001")) == b"s3cret"
@@ -0,0 +1,73 @@
+"""Tests for the named collection registry."""
+import numpy as np
+import pytest
+
+from src.index_registry import IndexRegistry
+
+faiss = pytest.importorskip("faiss")
+
+
+def save_ticket_embeddings(path, n=20, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(n, dim)).astype("float32")
+    faiss.normalize_L2(vectors)
+    # Same layout as `python -m src.vectorize`: a pickled {id: vector} dict
+    np.save(path, {f"T-{i}": vectors[i] for i in range(n)})
+    return vectors
+
+
+def test_collections_load_lazily_and_report_stats(tmp_path, fixed_embedder):
+    vectors = save_ticket_embeddings(tmp_path / "tickets.npy")
+    registry = IndexRegistry()
+    registry.register_path("tickets", str(tmp_path / "tickets.npy"), index_factory="HNSW8")
+    assert registry.stats()["collections"]["tickets"]["loaded"] is False
+
+    hits = registry.search("tickets", "printer offline", top_k=1, embedder=fixed_embedder(vectors[3]))
+    assert hits[0][0]["orig_id"] == "T-3"
+    stats = registry.stats()["collections"]["tickets"]
+    assert stats["loaded"] and stats["loads"] == 1 and stats["searches"] == 1
+    assert stats["vectors"] == 20 and stats["memory_bytes"] > 0
+
+    with pytest.raises(KeyError):
+        registry.get("missing")
+
+
+def test_least_recently_used_collection_is_evicted_over_budget(tmp_path):
+    save_ticket_embeddings(tmp_path / "a.npy", seed=1)
+    save_ticket_embeddings(tmp_path / "b.npy", seed=2)
+    probe = IndexRegistry()
+    probe.register_path("a", str(tmp_path / "a.npy"))
+    probe.get("a")
+    one = probe.stats()["memory_bytes"]
+
+    registry = IndexRegistry(memory_budget=int(one * 1.5))
+    registry.register_path("a", str(tmp_path / "a.npy"))
+    registry.register_path("b", str(tmp_path / "b.npy"))
+    registry.get("a")
+    registry.get("b")
+    stats = registry.stats()["collections"]
+    assert not stats["a"]["loaded"] and stats["a"]["evictions"] == 1
+    assert stats["b"]["loaded"]
+
+    registry.get("a")  # reloads on next use, evicting b
+    stats = registry.stats()["collections"]
+    assert stats["a"]["loads"] == 2 and not stats["b"]["loaded"]
+
+
+def test_collection_over_its_own_budget_fails_to_load(tmp_path):
+    save_ticket_embeddings(tmp_path / "t.npy")
+    registry = IndexRegistry()
+    registry.register_path("t", str(tmp_path / "t.npy"), memory_budget=100)
+    with pytest.raises(RuntimeError):
+        registry.get("t")
+    assert "budget" in registry.stats()["collections"]["t"]["load_error"]
+
+
+def test_npy_collection_hits_carry_ticket_metadata(tmp_path, fixed_embedder):
+    vectors = save_ticket_embeddings(tmp_path / "tickets.npy", n=3)
+    meta = tmp_path / "tickets_meta.json"
+    meta.write_text('{"T-1": {"orig_id": "T-1", "title": "Printer offline", "snippet": "Since Monday"}}')
+    registry = IndexRegistry()
+    registry.register_path("tickets", str(tmp_path / "tickets.npy"), meta_path=str(meta))
+    hit = registry.search("tickets", "printer", top_k=1, embedder=fixed_embedder(vectors[1]))[0][0]
+    assert hit["title"] == "Printer offline" and hit["snippet"] == "Since Monday"
@@ -0,0 +1,146 @@
+"""Tests for versioned index snapshots and hot-swapping."""
+import time
+
+import pytest
+
+faiss = pytest.importorskip("faiss")
+
+from src.faiss_index import FaissIndexManager
+from src.index_snapshots import IndexHotSwapper, SnapshotStore
+
+
+def titles(manager):
+    return sorted(meta["title"] for meta in manager.id_to_meta.values())[:1]
+
+
+def test_reload_swaps_and_rollback_restores(tmp_path, write_snapshot):
+    store = SnapshotStore(str(tmp_path))
+    v1 = write_snapshot(store, "old")
+    v2 = write_snapshot(store, "new")
+    store.activate(v1)
+
+    live = FaissIndexManager()
+    swapper = IndexHotSwapper(live, store)
+    assert swapper.reload() == v1
+    version_before = live.version
+    assert titles(live) == ["old-0"]
+
+    swapper.reload(v2)
+    assert titles(live) == ["new-0"]
+    assert live.version != version_before  # result cache invalidated
+    # Swapping one process's index doesn't publish the version
+    assert store.current() == v1
+
+    assert swapper.rollback() == v1
+    assert titles(live) == ["old-0"]
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_pointer_changes_reach_every_worker(tmp_path, write_snapshot):
+    store = SnapshotStore(str(tmp_path))
+    v1 = write_snapshot(store, "old")
+    v2 = write_snapshot(store, "new")
+    store.activate(v1)
+
+    # One swapper per preforked worker, each with its own live manager
+    workers = []
+    for _ in range(2):
+        swapper = IndexHotSwapper(FaissIndexManager(), store)
+        swapper.reload()
+        swapper.watch(interval=0.02)
+        workers.append(swapper)
+    try:
+        store.activate(v2)  # what POST /admin/index/reload does
+        assert wait_until(lambda: all(w.live_version == v2 for w in workers))
+        assert all(titles(w.manager) == ["new-0"] for w in workers)
+
+        assert store.rollback() == v1  # POST /admin/index/rollback
+        assert wait_until(lambda: all(w.live_version == v1 for w in workers))
+        assert store.current() == v1 and store.previous() == v2
+
+        # Re-publishing the unchanged CURRENT still reloads every worker
+        swaps = [w.last_swap_at for w in workers]
+        store.activate(v1)
+        assert wait_until(lambda: all(w.last_swap_at != s for w, s in zip(workers, swaps)))
+    finally:
+        for w in workers:
+            w.stop()
+
+
+def test_watcher_catches_up_with_a_pointer_moved_before_it_started(tmp_path, write_snapshot):
+    store = SnapshotStore(str(tmp_path))
+    v1 = write_snapshot(store, "old")
+    v2 = write_snapshot(store, "new")
+    store.activate(v1)
+    swapper = IndexHotSwapper(FaissIndexManager(), store)
+    swapper.reload()
+    store.activate(v2)
+    swapper.watch(interval=0.02)
+    try:
+        assert wait_until(lambda: swapper.live_version == v2)
+    finally:
+        swapper.stop()
+
+
+def test_failed_smoke_test_keeps_live_index(tmp_path, write_snapshot):
+    store = SnapshotStore(str(tmp_path))
+    good = write_snapshot(store, "good")
+    bad = write_snapshot(store, "bad", meta_count=1)
+
+    live = FaissIndexManager()
+    swapper = IndexHotSwapper(live, store)
+    swapper.reload(good)
+    with pytest.raises(RuntimeError, match="metadata"):
+        swapper.reload(bad)
+    assert titles(live) == ["good-0"]
+    assert swapper.live_version == good
+    assert swapper.status()["last_error"].startswith(bad)
+
+
+def test_snapshot_with_wrong_dimension_for_live_embedder_is_rejected(tmp_path, write_snapshot, fixed_embedder):
+    store = SnapshotStore(str(tmp_path))
+    good = write_snapshot(store, "good", n=4)
+    wide = write_snapshot(store, "wide", n=8)
+
+    live = FaissIndexManager()
+    swapper = IndexHotSwapper(live, store, embedder=fixed_embedder(4))
+    swapper.reload(good)
+    with pytest.raises(RuntimeError, match="8-d query vectors"):
+        swapper.reload(wide)
+    assert titles(live) == ["good-0"]
+    assert live.search("still serving", top_k=1, embedder=fixed_embedder(4))
+
+
+def test_admin_endpoints_fail_closed_and_publish_through_the_pointer(tmp_path, monkeypatch, write_snapshot):
+    from fastapi.testclient import TestClient
+
+    from src import api
+
+    store = SnapshotStore(str(tmp_path))
+    v1 = write_snapshot(store, "old")
+    v2 = write_snapshot(store, "new")
+    store.activate(v1)
+    swapper = IndexHotSwapper(FaissIndexManager(), store)
+    swapper.reload()
+    monkeypatch.setattr(api, "index_swapper", swapper)
+    client = TestClient(api.app)
+
+    monkeypatch.setattr(api, "ADMIN_TOKEN", None)
+    assert client.post("/admin/index/rollback").status_code == 503
+    monkeypatch.setattr(api, "ADMIN_TOKEN", "s3cret")
+    assert client.post("/admin/index/reload", data={"version": v2}).status_code == 403
+
+    headers = {"X-Admin-Token": "s3cret"}
+    assert client.post("/admin/index/reload", data={"version": v2}, headers=headers).status_code == 202
+    # No watcher in this process, so it swaps itself after the response
+    assert store.current() == v2 and swapper.live_version == v2
+    assert client.post("/admin/index/rollback", headers=headers).json()["current"] == v1
+    assert store.current() == v1 and titles(swapper.manager) == ["old-0"]
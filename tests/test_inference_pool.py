@@ -0,0 +1,48 @@
+"""Tests for the out-of-process inference pool."""
+import os
+import signal
+
+import pytest
+
+from src.inference_pool import InferencePool, WorkerCrashedError
+
+
+@pytest.fixture
+def pool():
+    p = InferencePool(workers=1, timeout=60)
+    p.start()
+    yield p
+    p.close()
+
+
+def test_worker_errors_are_returned_to_caller(pool):
+    with pytest.raises(RuntimeError, match="unknown inference method"):
+        pool.call("no_such_method")
+
+
+def test_pool_recovers_from_worker_crash(pool):
+    victim = pool._workers[0].process
+    os.kill(victim.pid, signal.SIGKILL)
+    victim.join(timeout=10)
+
+    # The next request either lands on the replacement worker or fails
+    # cleanly; it never hangs and the pool keeps serving afterwards.
+    try:
+        pool.call("no_such_method")
+    except WorkerCrashedError:
+        pass
+    except RuntimeError as e:
+        assert "unknown inference method" in str(e)
+
+    with pytest.raises(RuntimeError, match="unknown inference method"):
+        pool.call("no_such_method")
+    assert pool.stats()["restarts"] == 1
+
+
+def test_model_loaded_is_a_status_query(pool):
+    # Asking must not load bart-large-mnli in the workers
+    assert pool.broadcast("model_loaded", timeout=30) == [False]
+
+
+def test_tier_counts_are_summed_across_workers(pool):
+    assert pool.tier_counts(timeout=30) == {"cheap": 0, "model": 0, "fallback": 0}
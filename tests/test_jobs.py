@@ -0,0 +1,243 @@
+"""Tests for the durable bulk triage job queue."""
+import json
+import sqlite3
+import time
+
+import pytest
+
+from src.jobs import JobRunner, JobStore, iter_tickets
+
+
+def fake_classify(texts):
+    return [{"low": 0.2, "medium": 0.3, "high": 0.5} for _ in texts]
+
+
+def wait_for(store, job_id, status, timeout=10.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if store.get_job(job_id)["status"] == status:
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def job_ids(store):
+    with sqlite3.connect(store.db_path) as conn:
+        return [row[0] for row in conn.execute("SELECT id FROM jobs")]
+
+
+def test_iter_tickets_reads_jsonl_and_csv(tmp_path):
+    jsonl = tmp_path / "t.jsonl"
+    jsonl.write_text('{"id": 1, "text": "Login broken"}\n{"id": 2}\n{"body": "DB down"}\n')
+    assert list(iter_tickets(str(jsonl))) == [("1", "Login broken"), (None, "DB down")]
+
+    csv_path = tmp_path / "t.csv"
+    csv_path.write_text('ticket_id,description\na1,"Slow, very slow"\n')
+    assert list(iter_tickets(str(csv_path))) == [("a1", "Slow, very slow")]
+
+
+def test_job_runs_to_completion_in_chunks(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    job_id = store.create_job(((str(i), f"ticket {i}") for i in range(25)), {"recommend": False})
+    runner = JobRunner(store, classify_batch=fake_classify, chunk_size=10, poll_interval=0.05)
+    runner.start()
+    try:
+        assert wait_for(store, job_id, "completed")
+    finally:
+        runner.stop()
+
+    job = store.get_job(job_id)
+    assert job["processed"] == 25 and job["failed"] == 0
+    results = [json.loads(line) for line in store.iter_results(job_id)]
+    assert [r["index"] for r in results] == list(range(25))
+    assert results[3]["id"] == "3" and results[3]["priority"] == "high"
+
+
+def test_interrupted_job_resumes_from_checkpoint(tmp_path):
+    db = str(tmp_path / "jobs.sqlite3")
+    store = JobStore(db)
+    job_id = store.create_job((None, f"ticket {i}") for i in range(30))
+
+    # Simulate a crash after the first chunk was committed
+    assert store.claim_next() == job_id
+    store.save_chunk(job_id, [(i, {"index": i}) for i in range(10)])
+
+    seen = []
+
+    def recording_classify(texts):
+        seen.extend(texts)
+        return fake_classify(texts)
+
+    # The crashed runner's lease goes stale after lease_timeout
+    runner = JobRunner(
+        JobStore(db), classify_batch=recording_classify, chunk_size=10, poll_interval=0.05, lease_timeout=0.2
+    )
+    runner.start()
+    try:
+        assert wait_for(store, job_id, "completed")
+    finally:
+        runner.stop()
+
+    assert seen == [f"ticket {i}" for i in range(10, 30)]
+    assert store.get_job(job_id)["processed"] == 30
+
+
+def test_second_runner_does_not_steal_a_live_job(tmp_path):
+    db = str(tmp_path / "jobs.sqlite3")
+    store = JobStore(db)
+    job_id = store.create_job((None, f"ticket {i}") for i in range(30))
+    seen = []
+
+    def slow_classify(texts):
+        seen.extend(texts)
+        time.sleep(0.1)
+        return fake_classify(texts)
+
+    first = JobRunner(JobStore(db), classify_batch=slow_classify, chunk_size=5, poll_interval=0.05, lease_timeout=1.0)
+    first.start()
+    try:
+        time.sleep(0.15)
+        # e.g. another preforked worker starting up mid-job
+        second = JobRunner(JobStore(db), classify_batch=slow_classify, chunk_size=5, poll_interval=0.05, lease_timeout=1.0)
+        second.start()
+        try:
+            assert wait_for(store, job_id, "completed")
+        finally:
+            second.stop()
+    finally:
+        first.stop()
+
+    assert sorted(seen) == sorted(f"ticket {i}" for i in range(30))
+    assert store.get_job(job_id)["processed"] == 30
+    assert [json.loads(l)["index"] for l in store.iter_results(job_id)] == list(range(30))
+
+
+def test_saving_a_chunk_twice_does_not_advance_past_unsaved_tickets(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    job_id = store.create_job((None, f"ticket {i}") for i in range(20))
+    store.save_chunk(job_id, [(i, {"index": i}) for i in range(10)])
+    store.save_chunk(job_id, [(i, {"index": i}) for i in range(10)])
+    assert store.get_job(job_id)["processed"] == 10
+    assert store.next_chunk(job_id, 5)[0][0] == 10
+
+
+def test_runner_survives_database_errors(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    job_id = store.create_job((None, f"ticket {i}") for i in range(5))
+
+    class LockedOnce(JobStore):
+        calls = 0
+
+        def claim_next(self, owner=None):
+            LockedOnce.calls += 1
+            if LockedOnce.calls == 1:
+                raise sqlite3.OperationalError("database is locked")
+            return super().claim_next(owner)
+
+    runner = JobRunner(LockedOnce(store.db_path), classify_batch=fake_classify, poll_interval=0.05)
+    runner.start()
+    try:
+        assert wait_for(store, job_id, "completed")
+    finally:
+        runner.stop()
+    assert LockedOnce.calls > 1
+
+
+def test_only_abandoned_uploads_fail_while_loading(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    seen = {}
+
+    def tickets():
+        for i in range(10):
+            if i == 6:
+                # Mid-upload: the committed batches are visible as "loading"
+                job_id = job_ids(store)[0]
+                seen["during"] = store.get_job(job_id)["status"]
+                store.requeue_interrupted(lease_timeout=60)
+                seen["after_requeue"] = store.get_job(job_id)["status"]
+            yield None, f"ticket {i}"
+
+    job_id = store.create_job(tickets(), insert_batch=3)
+    assert seen == {"during": "loading", "after_requeue": "loading"}
+    assert store.get_job(job_id)["status"] == "queued" and store.get_job(job_id)["total"] == 10
+
+    stale = store.create_job((None, "x") for _ in range(2))
+    with sqlite3.connect(store.db_path) as conn:
+        conn.execute("UPDATE jobs SET status = 'loading', heartbeat = 0 WHERE id = ?", (stale,))
+    store.requeue_interrupted(lease_timeout=60)
+    assert store.get_job(stale)["status"] == "failed"
+
+
+def test_failed_upload_leaves_no_job(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+
+    def tickets():
+        yield None, "ok"
+        raise ValueError("bad row")
+
+    with pytest.raises(ValueError):
+        store.create_job(tickets(), insert_batch=1)
+    assert job_ids(store) == []
+
+
+@pytest.fixture
+def jobs_client(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from src import api
+
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    monkeypatch.setattr(api, "job_store", store)
+    # No runner: tests drive the jobs themselves
+    monkeypatch.setattr(api, "job_runner", None)
+    return TestClient(api.app), store
+
+
+def upload(client, rows, filename="tickets.jsonl"):
+    body = "\n".join(json.dumps(r) for r in rows)
+    return client.post("/jobs", files={"file": (filename, body.encode(), "application/octet-stream")})
+
+
+def test_jobs_api_upload_progress_results_and_cancel(jobs_client):
+    client, store = jobs_client
+    response = upload(client, [{"id": i, "text": f"ticket {i}"} for i in range(12)])
+    assert response.status_code == 200
+    job = response.json()
+    assert job["status"] == "queued" and job["total"] == 12 and job["progress"] == 0.0
+
+    # Process the first two chunks, as a runner would
+    assert store.claim_next("test") == job["job_id"]
+    runner = JobRunner(store, classify_batch=fake_classify, chunk_size=5)
+    for _ in range(2):
+        chunk = store.next_chunk(job["job_id"], 5)
+        store.save_chunk(job["job_id"], *runner._process_chunk(chunk, False, 5))
+    status = client.get(f"/jobs/{job['job_id']}").json()
+    assert status["status"] == "running" and status["processed"] == 10
+    assert status["progress"] == pytest.approx(10 / 12)
+
+    lines = client.get(f"/jobs/{job['job_id']}/results").text.splitlines()
+    assert [json.loads(l)["index"] for l in lines] == list(range(10))
+    page = client.get(f"/jobs/{job['job_id']}/results", params={"offset": 4, "limit": 3}).text.splitlines()
+    assert [json.loads(l)["id"] for l in page] == ["4", "5", "6"]
+    assert client.get(f"/jobs/{job['job_id']}/results", params={"limit": 0}).status_code == 422
+
+    cancelled = client.delete(f"/jobs/{job['job_id']}").json()
+    assert cancelled["status"] == "cancelled" and cancelled["processed"] == 10
+    # Results processed before the cancel stay downloadable
+    assert len(client.get(f"/jobs/{job['job_id']}/results").text.splitlines()) == 10
+
+
+def test_jobs_api_reads_csv_and_rejects_bad_files(jobs_client):
+    client, _ = jobs_client
+    csv_body = b"ticket_id,description\na1,Printer offline\na2,VPN drops\n"
+    response = client.post("/jobs", files={"file": ("t.csv", csv_body, "text/csv")})
+    assert response.json()["total"] == 2
+    bad = client.post("/jobs", files={"file": ("t.jsonl", b"{not json\n", "application/octet-stream")})
+    assert bad.status_code == 400
+
+
+def test_jobs_api_unknown_job_is_404(jobs_client):
+    client, _ = jobs_client
+    assert client.get("/jobs/nope").status_code == 404
+    assert client.get("/jobs/nope/results").status_code == 404
+    assert client.delete("/jobs/nope").status_code == 404
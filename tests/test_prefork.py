@@ -0,0 +1,132 @@
+"""Tests for the preforked multi-worker server."""
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import textwrap
+import time
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("uvicorn")
+
+from src import prefork
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_serve_prefork_requires_fork(monkeypatch):
+    monkeypatch.delattr(os, "fork")
+    with pytest.raises(RuntimeError, match="os.fork"):
+        prefork.serve_prefork(app=None, workers=2)
+
+
+def test_models_are_loaded_before_fork_without_inference():
+    torch = pytest.importorskip("torch")
+
+    class Pipeline:
+        model = torch.nn.Linear(4, 2)
+
+    class Classifier:
+        _classifier = None
+        loads = 0
+
+        def _ensure_pipeline(self):
+            self.loads += 1
+            self._classifier = Pipeline()
+
+        def classify(self, text):
+            raise AssertionError("no inference before fork")
+
+    class Vectorizer:
+        model = torch.nn.Linear(4, 2)
+
+        def encode(self, texts, **kwargs):
+            raise AssertionError("no inference before fork")
+
+    classifier, vectorizer = Classifier(), Vectorizer()
+    try:
+        assert prefork.prepare_models_for_fork(classifier, vectorizer) == 2
+    finally:
+        torch.set_grad_enabled(True)
+    assert classifier.loads == 1
+    for module in (classifier._classifier.model, vectorizer.model):
+        assert not module.training
+        assert not any(p.requires_grad for p in module.parameters())
+        assert all(p.is_shared() for p in module.parameters())
+
+
+def test_pool_backed_models_are_left_alone():
+    class RemoteClassifier:
+        pass
+
+    class RemoteVectorizer:
+        pass
+
+    assert prefork.prepare_models_for_fork(RemoteClassifier(), RemoteVectorizer()) == 0
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def children_of(pid: int):
+    try:
+        return (Path(f"/proc/{pid}/task/{pid}/children").read_text()).split()
+    except OSError:
+        pytest.skip("needs /proc/<pid>/task/<pid>/children")
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="prefork mode needs os.fork")
+def test_prefork_serves_from_the_requested_number_of_workers():
+    port = free_port()
+    script = textwrap.dedent(f"""
+        import os
+        from fastapi import FastAPI
+        from src.prefork import serve_prefork
+
+        app = FastAPI()
+
+        @app.get("/pid")
+        def pid():
+            return {{"pid": os.getpid()}}
+
+        serve_prefork(app, host="127.0.0.1", port={port}, workers=3, log_level="warning")
+    """)
+    parent = subprocess.Popen([sys.executable, "-c", script], cwd=str(ROOT))
+    try:
+        pid = None
+        deadline = time.time() + 30
+        while pid is None and time.time() < deadline:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/pid", timeout=1) as response:
+                    pid = json.load(response)["pid"]
+            except OSError:
+                time.sleep(0.1)
+        assert pid is not None, "no worker answered"
+        workers = children_of(parent.pid)
+        assert len(workers) == 3
+        assert str(pid) in workers and pid != parent.pid
+    finally:
+        parent.send_signal(signal.SIGTERM)
+        assert parent.wait(timeout=15) == 0
+
+
+def test_server_refuses_workers_with_an_inference_pool():
+    env = dict(os.environ, TICKET_INFERENCE_WORKERS="1")
+    result = subprocess.run(
+        [sys.executable, "server.py", "--workers", "2"],
+        cwd=str(ROOT),
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
+    assert result.returncode != 0
+    assert "cannot be combined with TICKET_INFERENCE_WORKERS" in result.stderr
@@ -0,0 +1,74 @@
+"""Tests for the priority classifier cascade."""
+from src.priority import TicketPriorityClassifier
+
+
+class FakeZeroShot:
+    """Stands in for the transformers pipeline and records what it sees."""
+
+    def __init__(self):
+        self.seen = []
+
+    def __call__(self, texts, candidate_labels, multi_label=False, batch_size=None):
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+        self.seen.extend(batch)
+        out = [{"labels": ["medium", "high", "low"], "scores": [0.6, 0.3, 0.1]} for _ in batch]
+        return out[0] if single else out
+
+
+def make_classifier(threshold):
+    clf = TicketPriorityClassifier(cascade_threshold=threshold)
+    clf._classifier = FakeZeroShot()
+    return clf
+
+
+def test_confident_tickets_skip_the_model():
+    clf = make_classifier(0.5)
+    assert clf.get_priority("CRITICAL: Database connection failures")[0] == "high"
+    assert clf.get_priority("Feature request: Add export to Excel")[0] == "low"
+    assert clf._classifier.seen == []
+    assert clf.tier_counts["cheap"] == 2
+
+
+def test_unsure_tickets_go_to_the_model():
+    clf = make_classifier(0.5)
+    # No keyword evidence at all, and a tie between high and medium
+    results = clf.classify_batch(["Hello there", "slow and urgent", "Site is down"])
+    assert sorted(clf._classifier.seen) == ["Hello there", "slow and urgent"]
+    assert [max(r, key=r.get) for r in results] == ["medium", "medium", "high"]
+    assert clf.tier_counts == {"cheap": 1, "model": 2, "fallback": 0}
+
+
+def test_without_threshold_every_ticket_uses_the_model():
+    clf = make_classifier(None)
+    clf.classify_batch(["CRITICAL outage", "Feature request"])
+    assert clf.tier_counts["model"] == 2 and clf.tier_counts["cheap"] == 0
+
+
+class KeywordZeroShot(FakeZeroShot):
+    """Says high for text mentioning fire, low otherwise."""
+
+    def __call__(self, texts, candidate_labels, multi_label=False, batch_size=None):
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+        self.seen.extend(batch)
+        out = [
+            {"labels": ["high", "low", "medium"], "scores": [0.9, 0.1, 0.0]} if "fire" in t
+            else {"labels": ["low", "high", "medium"], "scores": [0.9, 0.1, 0.0]}
+            for t in batch
+        ]
+        return out[0] if single else out
+
+
+def test_long_tickets_are_chunked_the_same_in_classify_and_classify_batch():
+    clf = TicketPriorityClassifier(max_input_tokens=40, max_chunks=8)
+    clf._classifier = KeywordZeroShot()
+    # ~3/4 of the words fall in chunks that mention fire
+    text = " ".join(["fire"] * 90 + ["calm"] * 30)
+
+    single = clf.classify(text)
+    batched = clf.classify_batch([text, "short calm ticket"])
+    assert len(clf._classifier.seen) > 2  # chunks, not whole tickets, reached the model
+    assert batched[0] == single
+    assert 0.5 < single["high"] < 0.9 and abs(sum(single.values()) - 1.0) < 1e-6
+    assert max(batched[1], key=batched[1].get) == "low"
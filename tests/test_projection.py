@@ -0,0 +1,63 @@
+"""Tests for the PCA projection stage of the FAISS index."""
+import numpy as np
+import pytest
+
+from src.faiss_index import FaissIndexManager
+from src.projection import apply_projection, compare_projection, fit_projection
+
+faiss = pytest.importorskip("faiss")
+
+
+def low_rank_vectors(n=400, dim=32, rank=6, seed=0):
+    rng = np.random.default_rng(seed)
+    x = rng.normal(size=(n, rank)) @ rng.normal(size=(rank, dim))
+    x += 0.01 * rng.normal(size=(n, dim))
+    x = x.astype("float32")
+    faiss.normalize_L2(x)
+    return x
+
+
+def test_projection_keeps_recall_on_low_rank_data():
+    x = low_rank_vectors()
+    pca = fit_projection(x, 8)
+    reduced = apply_projection(pca, x)
+    assert reduced.shape == (400, 8)
+    assert np.allclose(np.linalg.norm(reduced, axis=1), 1.0, atol=1e-4)
+    report = compare_projection(x, 8, k=5, n_queries=50)
+    assert report["recall_at_k"] > 0.8
+    assert report["reduced_bytes"] == report["full_bytes"] / 4
+
+
+def test_compare_projection_fits_without_the_held_out_queries(monkeypatch):
+    from src import projection
+
+    fitted_on = []
+    real_fit = projection.fit_projection
+
+    def recording_fit(embeddings, dim, whiten=False):
+        fitted_on.append(embeddings)
+        return real_fit(embeddings, dim, whiten)
+
+    monkeypatch.setattr(projection, "fit_projection", recording_fit)
+    x = low_rank_vectors()
+    report = compare_projection(x, 8, k=5, n_queries=50)
+    assert report["queries"] == 50 and len(fitted_on) == 1
+    fitted = {row.tobytes() for row in fitted_on[0]}
+    assert len(fitted) == 350
+    assert sum(row.tobytes() in fitted for row in x) == 350
+
+
+def test_projection_is_saved_and_applied_to_queries(tmp_path, make_manager, fixed_embedder):
+    x = low_rank_vectors()
+    projection = fit_projection(x, 8, whiten=True)
+    manager = make_manager(apply_projection(projection, x), [{"title": f"a{i}"} for i in range(len(x))])
+    manager.projection = projection
+
+    index_path = str(tmp_path / "faiss.index")
+    manager.save(index_path, str(tmp_path / "meta.json"))
+    loaded = FaissIndexManager()
+    loaded.load(index_path, str(tmp_path / "meta.json"))
+    assert loaded.projection is not None and loaded.index.d == 8
+
+    hits = loaded.search("anything", top_k=1, embedder=fixed_embedder(x[17]))
+    assert hits[0][0]["title"] == "a17"
@@ -55,4 +55,71 @@ def test_encode_tickets(sample_tickets):
     
     # Check if embeddings are normalized
     for emb in embeddings.values():
-        assert np.abs(np.linalg.norm(emb) - 1.0) < 1e-6
\ No newline at end of file
+        assert np.abs(np.linalg.norm(emb) - 1.0) < 1e-6
+
+
+class FakeModel:
+    """Maps texts to fixed unit vectors so averaging is easy to check."""
+
+    max_seq_length = 40
+    tokenizer = None
+
+    def encode(self, texts, **kwargs):
+        single = isinstance(texts, str)
+        batch = [texts] if single else texts
+        out = np.array([[1.0, 0.0] if "alpha" in t else [0.0, 1.0] for t in batch], dtype="float32")
+        return out[0] if single else out
+
+
+def test_encode_document_averages_chunks():
+    vectorizer = TicketVectorizer.__new__(TicketVectorizer)
+    vectorizer.model = FakeModel()
+    short = vectorizer.encode_document("alpha only")
+    assert np.allclose(short, [1.0, 0.0])
+
+    doc = " ".join(["alpha"] * 60 + ["beta"] * 60)
+    emb = vectorizer.encode_document(doc)
+    assert abs(np.linalg.norm(emb) - 1.0) < 1e-5
+    assert emb[0] > 0.3 and emb[1] > 0.3
+
+
+def test_encode_documents_matches_encode_document():
+    vectorizer = TicketVectorizer.__new__(TicketVectorizer)
+    vectorizer.model = FakeModel()
+    docs = ["alpha only", " ".join(["alpha"] * 60 + ["beta"] * 60), "beta"]
+    batched = vectorizer.encode_documents(docs)
+    assert batched.shape == (3, 2)
+    for doc, emb in zip(docs, batched):
+        assert np.allclose(emb, vectorizer.encode_document(doc), atol=1e-6)
+
+
+def test_search_batch_embeds_long_tickets_like_search(make_manager):
+    vectorizer = TicketVectorizer.__new__(TicketVectorizer)
+    vectorizer.model = FakeModel()
+    manager = make_manager(
+        [[1.0, 0.0], [0.7071, 0.7071]], [{"title": "alpha"}, {"title": "alpha and beta"}], cache_size=0
+    )
+
+    # Encoded whole, "alpha" anywhere in the text wins; chunk-wise it's a mix
+    doc = " ".join(["alpha"] * 60 + ["beta"] * 60)
+    single = manager.search(doc, top_k=1, embedder=vectorizer)
+    batched = manager.search_batch([doc, "beta"], top_k=1, embedder=vectorizer)
+    assert single[0][0]["title"] == "alpha and beta"
+    assert batched[0][0][0]["title"] == "alpha and beta"
+    assert batched[0][0][1] == pytest.approx(single[0][1], abs=1e-5)
+
+
+def test_ticket_metadata_keys_tickets_without_ids_by_line(tmp_path):
+    from src.vectorize import ticket_metadata
+
+    path = tmp_path / "tickets.jsonl"
+    path.write_text(
+        '{"id": "T-1", "text": "Printer offline\\nsince Monday"}\n'
+        '{"text": "VPN drops every hour"}\n'
+        '{"text": ""}\n'
+        '{"text": "Cannot log in", "title": "Login"}\n'
+    )
+    meta = ticket_metadata(path)
+    assert list(meta) == ["T-1", "1", "3"]
+    assert meta["T-1"]["title"] == "Printer offline since Monday"
+    assert meta["3"] == {"orig_id": "3", "title": "Login", "snippet": "Cannot log in"}